@@ -0,0 +1,34 @@
+"""Compares catalog timestamp parsing with datetime.strptime.
+
+Usage: python -m benchmarks.bench_timestamps [count]
+"""
+
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from catalogclient import catalog
+
+
+def main(count=100000):
+    start = datetime(2014, 1, 1)
+    values = [(start + timedelta(hours=i)).strftime(catalog.TIMESTAMP_FORMAT)
+              for i in range(count)]
+
+    def baseline():
+        return [datetime.strptime(value, catalog.TIMESTAMP_FORMAT) for value in values]
+
+    def fast():
+        return catalog.Catalog._build_times(values) # pylint: disable=W0212
+
+    assert baseline() == fast()
+    baseline_time = min(timeit.repeat(baseline, number=1, repeat=3))
+    fast_time = min(timeit.repeat(fast, number=1, repeat=3))
+    print("{0} timestamps".format(count))
+    print("strptime:  {0:.3f}s".format(baseline_time))
+    print("catalog:   {0:.3f}s".format(fast_time))
+    print("speedup:   {0:.1f}x".format(baseline_time / fast_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
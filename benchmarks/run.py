@@ -0,0 +1,148 @@
+"""Benchmarks the catalog client against a local stand-in catalog.
+
+Each Catalog method is measured end to end, and _build_products in isolation,
+reporting latency percentiles, throughput and peak memory. Results can be
+saved and compared with those of another version:
+
+    python -m benchmarks.run --products 100000 --output new.json --compare old.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import catalogclient
+from catalogclient import catalog
+from benchmarks import synthetic
+from benchmarks.server import CatalogServer
+
+
+def _percentile(values, percentile):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round((len(values) - 1) * percentile / 100.0)))]
+
+
+def measure(name, function, repeat, items):
+    """
+    Runs a function repeatedly, measuring its duration, and once more with
+    tracemalloc enabled, measuring its peak memory.
+
+    :param items: The number of items handled by one run, for the throughput.
+    :return: A dict with the measurements.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    median = _percentile(durations, 50)
+    return {'name': name,
+            'repeat': repeat,
+            'p50': median,
+            'p90': _percentile(durations, 90),
+            'max': max(durations),
+            'items_per_second': items / median if median else None,
+            'peak_memory': peak}
+
+
+def run(products=10000, times=1000, latency=0.0, repeat=5):
+    """
+    Starts the stand-in catalog and runs all benchmarks against it.
+
+    Only the Catalog methods of the installed version are measured, so the
+    results can be compared with those of releases lacking some of them.
+    """
+    server = CatalogServer(products=products, times=times, latency=latency).start()
+    cat = catalog.Catalog(server.url)
+    try:
+        response = json.loads(server.bodies['products'].decode('utf-8'))
+        producttype = synthetic.PRODUCTTYPE
+        benchmarks = [
+            ('get_producttypes', cat.get_producttypes, 1),
+            ('get_times', lambda: cat.get_times(producttype), times),
+            ('get_products', lambda: cat.get_products(producttype), products),
+            ('get_products_for_year',
+             lambda: cat.get_products_for_year(producttype, 2016), products),
+            ('_build_products',
+             lambda: catalog.Catalog._build_products(response), products), # pylint: disable=W0212
+            ('_build_products+access',
+             lambda: [(p.geometry, p.timestamp)
+                      for p in catalog.Catalog._build_products(response)], # pylint: disable=W0212
+             products),
+        ]
+        if hasattr(cat, 'iter_products'):
+            benchmarks.insert(4, ('iter_products',
+                                  lambda: sum(1 for _ in cat.iter_products(producttype)),
+                                  products))
+        results = [measure(name, function, repeat, items)
+                   for name, function, items in benchmarks]
+    finally:
+        if hasattr(cat, 'close'):
+            cat.close()
+        server.stop()
+
+    return {'version': catalogclient.__version__,
+            'python': platform.python_version(),
+            'products': products,
+            'times': times,
+            'latency': latency,
+            'results': results}
+
+
+def report(results, baseline=None):
+    """Prints results, with the relative change against a baseline when given."""
+
+    previous = {}
+    if baseline is not None:
+        previous = dict((r['name'], r) for r in baseline['results'])
+        print("comparing {0} with {1}".format(results['version'], baseline['version']))
+        if (baseline['products'], baseline['times'], baseline['latency']) != \
+                (results['products'], results['times'], results['latency']):
+            print("warning: the baseline was measured with other sizes or latency")
+    print("{0:<24} {1:>10} {2:>10} {3:>14} {4:>12}".format(
+        'benchmark', 'p50 (s)', 'p90 (s)', 'items/s', 'peak (MB)'))
+    for result in results['results']:
+        line = "{0:<24} {1:>10.4f} {2:>10.4f} {3:>14.0f} {4:>12.1f}".format(
+            result['name'], result['p50'], result['p90'], result['items_per_second'] or 0,
+            result['peak_memory'] / 1e6)
+        old = previous.get(result['name'])
+        if old is not None and old['p50']:
+            line += "  time {0:+.0%} memory {1:+.0%}".format(
+                result['p50'] / old['p50'] - 1,
+                result['peak_memory'] / float(old['peak_memory'] or 1) - 1)
+        print(line)
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument('--products', type=int, default=10000,
+                           help="number of products in each products response")
+    arguments.add_argument('--times', type=int, default=1000,
+                           help="number of times in each times response")
+    arguments.add_argument('--latency', type=float, default=0.0,
+                           help="delay of the stand-in catalog, in seconds")
+    arguments.add_argument('--repeat', type=int, default=5)
+    arguments.add_argument('--output', help="file to save the results to, as JSON")
+    arguments.add_argument('--compare', help="results file of another version")
+    args = arguments.parse_args(argv)
+
+    results = run(args.products, args.times, args.latency, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+    report(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
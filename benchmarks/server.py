@@ -0,0 +1,132 @@
+"""A local stand-in for the catalog REST service, serving synthetic responses
+with an injectable latency.
+
+Usage: python benchmarks/server.py [--port 8080] [--products 100000] [--latency 0.05]
+"""
+
+import argparse
+import gzip
+import json
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse
+
+from benchmarks import synthetic
+
+
+class CatalogServer(ThreadingMixIn, HTTPServer):
+    """This class serves synthetic catalog responses.
+
+    The response bodies are encoded once up front, so the measured cost is
+    that of the client and the transfer, not of the stand-in.
+
+    :param products: The number of products returned by each products search.
+    :param times: The number of times returned for each product type.
+    :param latency: The delay before each response, in seconds.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), products=1000, times=1000, latency=0.0):
+
+        HTTPServer.__init__(self, address, CatalogHandler)
+        self.latency = latency
+        self.requests = 0
+        self.bodies = {
+            'producttypes': json.dumps([synthetic.PRODUCTTYPE]).encode('utf-8'),
+            'products': json.dumps(synthetic.products(products)).encode('utf-8'),
+            'times': json.dumps([t.strftime('%Y-%m-%dT%H:%M:%SZ')
+                                 for t in synthetic.times(times)]).encode('utf-8'),
+        }
+        self._compressed = {}
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base url of the stand-in catalog."""
+
+        return 'http://{0}:{1}/'.format(*self.server_address[:2])
+
+    def compressed(self, name):
+        """Returns a response body, gzip compressed."""
+
+        if name not in self._compressed:
+            self._compressed[name] = gzip.compress(self.bodies[name])
+        return self._compressed[name]
+
+    def start(self):
+        """Serves requests on a background thread."""
+
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+
+        self.shutdown()
+        self.server_close()
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    """This class answers requests like the catalog REST service."""
+
+    protocol_version = 'HTTP/1.1'
+    # headers and body are sent separately; without this, Nagle's algorithm and
+    # delayed ACKs add ~40 ms to every keep-alive request
+    disable_nagle_algorithm = True
+
+    def do_GET(self): # pylint: disable=C0103
+        self.server.requests += 1
+        path = urlparse(self.path).path.strip('/')
+        if not path:
+            name = 'producttypes'
+        elif path.endswith('/times'):
+            name = 'times'
+        else:
+            name = 'products'
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = self.server.compressed(name)
+            encoding = 'gzip'
+        else:
+            body = self.server.bodies[name]
+            encoding = None
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # pylint: disable=W0622
+        pass
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument('--port', type=int, default=8080)
+    arguments.add_argument('--products', type=int, default=1000)
+    arguments.add_argument('--times', type=int, default=1000)
+    arguments.add_argument('--latency', type=float, default=0.0)
+    args = arguments.parse_args()
+
+    server = CatalogServer(('127.0.0.1', args.port), args.products, args.times, args.latency)
+    print("Serving a synthetic catalog on " + server.url)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Generates synthetic catalog responses of configurable size, modelled on
+testresources/probav_geotiff.json: 10 degree tiles, five files per product
+and the PROBA-V band layout."""
+
+from datetime import datetime, timedelta
+
+PRODUCTTYPE = 'PROBAV_L3_S10_TOC_333M'
+FILES = [
+    ('TIME', ['PROBAV:TIME']),
+    ('SM', ['PROBAV:SM']),
+    ('RADIOMETRY', ['PROBAV:NIR/TOC', 'PROBAV:SWIR/TOC', 'PROBAV:RED/TOC', 'PROBAV:BLUE/TOC']),
+    ('NDVI', ['PROBAV:NDVI']),
+    ('GEOMETRY', ['PROBAV:SAA', 'PROBAV:VNIR/VAA', 'PROBAV:SZA', 'PROBAV:SWIR/VAA',
+                  'PROBAV:SWIR/VZA', 'PROBAV:VNIR/VZA']),
+]
+TILES_X = 36
+TILES_Y = 14
+START = datetime(2014, 1, 1)
+
+
+def times(count, step_days=10):
+    """Returns count acquisition times, step_days apart."""
+
+    return [START + timedelta(days=step_days * i) for i in range(count)]
+
+
+def product(producttype, tilex, tiley, timestamp):
+    """Returns the catalog JSON structure of one product."""
+
+    day = timestamp.strftime('%Y%m%d')
+    directory = 'file:/data/MTDA/TIFFDERIVED/{0}/{1}/PROBAV_S10_TOC_{1}_333M_V001/'.format(
+        producttype, day)
+    prefix = 'PROBAV_S10_TOC_X{0:02d}Y{1:02d}_{2}_333M_V001_'.format(tilex, tiley, day)
+    min_lon = -180.0 + 10 * tilex
+    max_lat = 75.0 - 10 * tiley
+    return {
+        'files': [{'bands': bands, 'filename': directory + prefix + suffix + '.tif'}
+                  for suffix, bands in FILES],
+        'productType': producttype,
+        'tileX': tilex,
+        'tileY': tiley,
+        'timestamp': timestamp.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'geometry': {'type': 'Polygon',
+                     'coordinates': [[[min_lon, max_lat], [min_lon, max_lat - 10],
+                                      [min_lon + 10, max_lat - 10], [min_lon + 10, max_lat],
+                                      [min_lon, max_lat]]]},
+    }
+
+
+def products(count, producttype=PRODUCTTYPE):
+    """Returns count products, covering all tiles of consecutive acquisition times."""
+
+    tiles = TILES_X * TILES_Y
+    acquisitions = times(count // tiles + 1)
+    return [product(producttype, (i % tiles) % TILES_X, (i % tiles) // TILES_X,
+                    acquisitions[i // tiles])
+            for i in range(count)]
@@ -0,0 +1,141 @@
+"""This module provides an asyncio catalog client for the internal PROBA-V MEP
+ and Copernicus Global Land catalogs. It requires the optional aiohttp package."""
+
+import asyncio
+
+import aiohttp
+
+from catalogclient.catalog import Catalog, CATALOG_BASE_URL, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from catalogclient.decoding import accept_encoding, get_decoder
+
+DEFAULT_CONCURRENCY = 10
+
+
+class AsyncCatalog(object):
+    """This class allows searching the catalog from asyncio code.
+
+    It offers the same methods as :class:`catalogclient.catalog.Catalog`, as
+    coroutines, on top of a pooled aiohttp session. The session is created on
+    first use inside the running event loop; use the catalog as an async
+    context manager, or await :meth:`close`, to release it.
+
+    :param baseurl: The base URL of the catalog REST service.
+    :param session: An optional preconfigured aiohttp session; it is not closed by :meth:`close`.
+    :param pool_size: The maximum number of simultaneous connections.
+    :param timeout: Request timeout in seconds, either a single number or a
+        (connect, read) tuple. None disables the timeout.
+    :param decoder: A callable decoding JSON from the response bytes, or the name of
+        a decoder known to :func:`catalogclient.decoding.get_decoder`.
+    """
+
+    def __init__(self, baseurl=CATALOG_BASE_URL, session=None, pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT, decoder=None):
+
+        self.baseurl = baseurl
+        self.decoder = decoder if callable(decoder) else get_decoder(decoder)
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def session(self):
+        """
+        The pooled session used for all catalog requests.
+        :return: An aiohttp.ClientSession object
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self._client_timeout(),
+                headers={'Accept-Encoding': accept_encoding()})
+        return self._session
+
+    def _client_timeout(self):
+        """Converts the requests style timeout to an aiohttp.ClientTimeout."""
+
+        if self.timeout is None:
+            return aiohttp.ClientTimeout(total=None)
+        if isinstance(self.timeout, tuple):
+            connect, read = self.timeout
+            return aiohttp.ClientTimeout(total=None, connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=None, connect=self.timeout, sock_read=self.timeout)
+
+    async def close(self):
+        """Closes the pooled connections, unless the session was passed in by the caller."""
+
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    async def _get_json(self, url, params=None, headers=None):
+        """Performs a GET request and returns the decoded JSON body."""
+
+        async with self.session.get(url, params=params, headers=headers) as response:
+            if response.status == 200:
+                return self.decoder(await response.read())
+            else:
+                response.raise_for_status()
+
+    async def get_producttypes(self):
+        """Returns the list of available product types."""
+
+        headers = {'Accept': 'application/json'}
+        return await self._get_json(self.baseurl, headers=headers)
+
+    async def get_products(self, producttype, fileformat='HDF5', startdate=None, enddate=None,
+                           min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Returns EOProducts for specified product type, file format, region of interest
+        and date range."""
+
+        url, params = Catalog._products_query(self.baseurl, producttype, fileformat,
+                                              startdate, enddate,
+                                              min_lon, max_lon, min_lat, max_lat)
+        return Catalog._build_products(await self._get_json(url, params=params))
+
+    async def get_products_for_year(self, producttype, year, fileformat='HDF5',
+                                    min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Returns EOProducts for specified product type, file format,
+        region of interest and year."""
+
+        url, params = Catalog._products_for_year_query(self.baseurl, producttype, year,
+                                                       fileformat,
+                                                       min_lon, max_lon, min_lat, max_lat)
+        return Catalog._build_products(await self._get_json(url, params=params))
+
+    async def get_times(self, producttype):
+        """Returns a list of dates at which a product is available in the catalog."""
+
+        url = Catalog._times_url(self.baseurl, producttype)
+        return Catalog._build_times(await self._get_json(url))
+
+    async def gather_products(self, queries, concurrency=DEFAULT_CONCURRENCY,
+                              return_exceptions=False):
+        """
+        Runs many product searches concurrently.
+
+        Each query is a dict of keyword arguments for :meth:`get_products`, or
+        for :meth:`get_products_for_year` when it contains a 'year' key.
+
+        :param queries: An iterable of query dicts.
+        :param concurrency: The maximum number of searches running at the same time.
+        :param return_exceptions: If True, a failing search yields its exception
+            instead of cancelling the whole batch.
+        :return: A list with the EOProducts of each query, in query order.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(query):
+            async with semaphore:
+                if 'year' in query:
+                    return await self.get_products_for_year(**query)
+                return await self.get_products(**query)
+
+        return await asyncio.gather(*[run(dict(query)) for query in queries],
+                                    return_exceptions=return_exceptions)
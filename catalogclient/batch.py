@@ -0,0 +1,172 @@
+"""This module provides batch searches, combining many catalog searches into
+ as few requests as possible and running them concurrently."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from shapely.prepared import prep
+
+from catalogclient.catalog import Catalog, _as_date
+
+DEFAULT_BATCH_WORKERS = 4
+DEFAULT_MERGE_DISTANCE = 0.5
+
+
+def _gap(a, b):
+    """Returns the largest distance between two (minx, miny, maxx, maxy) boxes along an axis."""
+
+    return max(a[0] - b[2], b[0] - a[2], a[1] - b[3], b[1] - a[3])
+
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _intersects(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def merge_regions(bounds, merge_distance=DEFAULT_MERGE_DISTANCE):
+    """
+    Clusters boxes that lie close to each other.
+
+    :param bounds: A list of (minx, miny, maxx, maxy) boxes.
+    :param merge_distance: Boxes less than this distance apart, in degrees, are merged.
+    :return: A list of (box, members) tuples, where members are the positions of the
+        input boxes covered by the merged box.
+    """
+    clusters = [(b, [i]) for i, b in enumerate(bounds)]
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for region, members in sorted(clusters):
+            for position, (other, other_members) in enumerate(result):
+                if _gap(region, other) <= merge_distance:
+                    result[position] = (_union(region, other), other_members + members)
+                    merged = True
+                    break
+            else:
+                result.append((region, members))
+        clusters = result
+    return [(region, sorted(members)) for region, members in clusters]
+
+
+def get_products_for_geometries(catalog, geometries, producttype, fileformat='HDF5',
+                                startdate=None, enddate=None,
+                                merge_distance=DEFAULT_MERGE_DISTANCE,
+                                max_workers=DEFAULT_BATCH_WORKERS):
+    """
+    Returns EOProducts for many regions of interest at once.
+
+    Geometries lying close to each other are searched with one request for
+    their combined bounding box. The requests run concurrently, after which
+    each product is assigned to the input geometries its footprint
+    intersects. Products without a footprint are assigned to every geometry
+    of their request.
+
+    :param catalog: The Catalog to search.
+    :param geometries: A list of shapely geometries, in longitude/latitude.
+    :param merge_distance: Geometries less than this distance apart, in degrees,
+        are searched with one request.
+    :param max_workers: The number of requests running at the same time.
+    :return: A list with the EOProducts of each geometry, in input order.
+    """
+    bounds = [geometry.bounds for geometry in geometries]
+    clusters = merge_regions(bounds, merge_distance)
+
+    def search(cluster):
+        (min_lon, min_lat, max_lon, max_lat), _ = cluster
+        return catalog.get_products(producttype, fileformat, startdate, enddate,
+                                    min_lon, max_lon, min_lat, max_lat)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(search, clusters))
+
+    products = [None] * len(geometries)
+    for (_, members), found in zip(clusters, results):
+        for position in members:
+            prepared = prep(geometries[position])
+            products[position] = [
+                product for product in found
+                if product.bbox is None
+                or (_intersects(product.bbox, bounds[position])
+                    and prepared.intersects(product.geometry))]
+    return products
+
+
+def _period(period):
+    """Normalises a year or (startdate, enddate) tuple; ranges covering one calendar year
+    become that year."""
+
+    if isinstance(period, tuple):
+        startdate, enddate = [_as_date(Catalog.convert_date(d)) for d in period]
+        if (startdate is not None and enddate is not None and startdate.year == enddate.year
+                and startdate == date(startdate.year, 1, 1)
+                and enddate == date(enddate.year, 12, 31)):
+            return startdate.year
+        return (startdate, enddate)
+    return int(period)
+
+
+def plan_requests(producttypes, periods):
+    """
+    Builds the list of distinct searches for some product types and periods.
+
+    :param producttypes: Product type names; duplicates are searched once.
+    :param periods: Years, or inclusive (startdate, enddate) tuples; duplicates,
+        including a year also given as a date range, are searched once.
+    :return: A list of (producttype, period) tuples, in input order.
+    """
+    seen = set()
+    plan = []
+    for producttype in producttypes:
+        for period in periods:
+            key = (producttype, _period(period))
+            if key not in seen:
+                seen.add(key)
+                plan.append(key)
+    return plan
+
+
+def get_products_batch(catalog, producttypes, periods, fileformat='HDF5',
+                       min_lon=-180, max_lon=180, min_lat=-90, max_lat=90,
+                       max_workers=DEFAULT_BATCH_WORKERS, return_exceptions=False):
+    """
+    Returns EOProducts for several product types and periods, searched concurrently.
+
+    :param catalog: The Catalog to search.
+    :param producttypes: Product type names, such as the result of get_producttypes.
+    :param periods: Years, searched with get_products_for_year, or inclusive
+        (startdate, enddate) tuples, searched with get_products.
+    :param fileformat: A file format, or a dict mapping product types to their file format.
+    :param max_workers: The number of searches running at the same time.
+    :param return_exceptions: If True, a failing search yields its exception
+        instead of cancelling the whole batch.
+    :return: A dict mapping (producttype, period) tuples to lists of EOProducts. Periods
+        are keyed as normalised by :func:`plan_requests`: ints for years, date tuples
+        for ranges.
+    """
+    bbox = (min_lon, max_lon, min_lat, max_lat)
+
+    def search(request):
+        producttype, period = request
+        if isinstance(fileformat, dict):
+            productformat = fileformat[producttype]
+        else:
+            productformat = fileformat
+        if isinstance(period, tuple):
+            return catalog.get_products(producttype, productformat, period[0], period[1], *bbox)
+        return catalog.get_products_for_year(producttype, period, productformat, *bbox)
+
+    plan = plan_requests(producttypes, periods)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(search, request) for request in plan]
+
+    results = {}
+    for request, future in zip(plan, futures):
+        error = future.exception()
+        if error is not None and not return_exceptions:
+            raise error
+        results[request] = future.result() if error is None else error
+    return results
@@ -0,0 +1,260 @@
+"""This module provides response caches for the catalog client: a bounded
+ in-memory LRU cache, an optional persistent SQLite cache, and a two tier
+ ResponseCache combining them with a time-to-live policy per endpoint."""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+from catalogclient.decoding import get_decoder
+
+DEFAULT_TTL = {
+    'producttypes': 24 * 3600,
+    'times': 3600,
+    'products': 3600,
+    # searches ending well in the past do not change anymore
+    'products_historical': None,
+}
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+
+
+def cache_key(url, params=None):
+    """Builds a cache key from an url and its query parameters, independent of their order."""
+
+    if not params:
+        return url
+    return url + '?' + urlencode(sorted((k, str(v)) for k, v in params.items()))
+
+
+class CacheEntry(object):
+    """This class represents a cached response body with its validators."""
+
+    __slots__ = ('content', 'etag', 'last_modified', 'stored_at')
+
+    def __init__(self, content, etag=None, last_modified=None, stored_at=None):
+
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.time() if stored_at is None else stored_at
+
+    def json(self):
+        """Decodes the cached response body."""
+
+        return get_decoder()(self.content)
+
+
+class MemoryCache(object):
+    """This class is a thread-safe LRU cache, bounded by the total size of the cached bodies.
+
+    :param max_bytes: The maximum total size of the cached bodies.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BYTES):
+
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the entry for a key, or None, and marks it as recently used."""
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+
+    def put(self, key, entry):
+        """Stores an entry, evicting the least recently used entries when the cache is full."""
+
+        size = len(entry.content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.content)
+            self._entries[key] = entry
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.content)
+
+    def clear(self):
+        """Removes all entries."""
+
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class SQLiteCache(object):
+    """This class is a persistent cache stored in a SQLite database, bounded
+    by the total size of the cached bodies. Entries are evicted least recently used first.
+
+    :param path: The path of the database file.
+    :param max_bytes: The maximum total size of the cached bodies.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_DISK_BYTES):
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, content BLOB, etag TEXT, last_modified TEXT, '
+                'stored_at REAL, accessed_at REAL, size INTEGER)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    @property
+    def size(self):
+        """The total size of the cached bodies."""
+
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, key):
+        """Returns the entry for a key, or None, and marks it as recently used."""
+
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT content, etag, last_modified, stored_at FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?',
+                                     (time.time(), key))
+        return CacheEntry(bytes(row[0]), row[1], row[2], row[3])
+
+    def put(self, key, entry):
+        """Stores an entry, evicting the least recently used entries when the cache is full."""
+
+        size = len(entry.content)
+        if size > self.max_bytes:
+            return
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, sqlite3.Binary(entry.content), entry.etag, entry.last_modified,
+                 entry.stored_at, time.time(), size))
+            total = self._connection.execute('SELECT SUM(size) FROM responses').fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._connection.execute(
+                    'SELECT key, size FROM responses ORDER BY accessed_at').fetchall()
+                evict = []
+                for evict_key, evict_size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((evict_key,))
+                    total -= evict_size
+                self._connection.executemany('DELETE FROM responses WHERE key = ?', evict)
+
+    def clear(self):
+        """Removes all entries."""
+
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+
+    def close(self):
+        """Closes the database connection."""
+
+        with self._lock:
+            self._connection.close()
+
+
+class ResponseCache(object):
+    """This class caches catalog responses in memory, backed by an optional persistent store.
+
+    Entries older than the time-to-live of their endpoint are stale: they are
+    revalidated with the server using their ETag or Last-Modified validators
+    instead of being returned directly.
+
+    :param memory: The in-memory cache; a MemoryCache by default.
+    :param disk: An optional persistent cache, such as a SQLiteCache.
+    :param ttl: A dict mapping endpoint names ('producttypes', 'times', 'products',
+        'products_historical') to a time-to-live in seconds, or None to never expire.
+        Missing endpoints use DEFAULT_TTL.
+    """
+
+    def __init__(self, memory=None, disk=None, ttl=None):
+
+        self.memory = MemoryCache() if memory is None else memory
+        self.disk = disk
+        self.ttl = dict(DEFAULT_TTL)
+        if ttl is not None:
+            self.ttl.update(ttl)
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        """
+        The cache counters.
+        :return: A dict with the number of hits, misses and revalidations.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations}
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def is_fresh(self, endpoint, entry):
+        """Tells whether an entry of an endpoint is within its time-to-live."""
+
+        ttl = self.ttl.get(endpoint)
+        return ttl is None or time.time() - entry.stored_at < ttl
+
+    def get(self, endpoint, key):
+        """
+        Looks up a response.
+
+        :return: A (entry, fresh) tuple; entry is None when the response is not cached.
+        """
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.memory.put(key, entry)
+        if entry is None:
+            self._count('misses')
+            return None, False
+        fresh = self.is_fresh(endpoint, entry)
+        self._count('hits' if fresh else 'revalidations')
+        return entry, fresh
+
+    def put(self, key, entry):
+        """Stores a response in all tiers."""
+
+        self.memory.put(key, entry)
+        if self.disk is not None:
+            self.disk.put(key, entry)
+
+    def clear(self):
+        """Removes all cached responses."""
+
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
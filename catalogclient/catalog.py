@@ -1,11 +1,14 @@
 """This module provides a Python catalog client for the internal PROBA-V MEP
- and Copernicus Global Land catalogs"""
+ and Copernicus Global Land catalogs
+
+requests, shapely and dateutil are imported on first use of the code that
+needs them, to keep importing this module cheap."""
 
 try:
     from urllib.parse import urljoin
 except ImportError:
     from urlparse import urljoin
-from datetime import datetime as dt, tzinfo, timedelta
+from datetime import date, datetime as dt, tzinfo, timedelta
 
 try:
     from datetime import timezone
@@ -20,15 +23,113 @@ except ImportError:
         def dst(self, dt):
             return timedelta(0)
     utc = UTC()
-from dateutil import parser
-import requests
-from shapely.geometry import shape
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+import threading
+
+from catalogclient.metrics import CallMetrics
+
+try:
+    from time import perf_counter as _clock
+except ImportError:
+    from time import time as _clock
 
 CATALOG_BASE_URL = 'https://proba-v-mep.esa.int/api/catalog/v2/'
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (10, 300)
+DEFAULT_SHARD_WORKERS = 4
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+HISTORICAL_AGE_DAYS = 30
+
+
+def _geojson_bounds(geojson):
+    """Computes the (minx, miny, maxx, maxy) bounds of a GeoJSON geometry dict."""
+
+    if geojson.get('type') == 'GeometryCollection':
+        bounds = [_geojson_bounds(geometry) for geometry in geojson['geometries']]
+        bounds = [b for b in bounds if b is not None]
+        if not bounds:
+            return None
+        return (min(b[0] for b in bounds), min(b[1] for b in bounds),
+                max(b[2] for b in bounds), max(b[3] for b in bounds))
+
+    xs = []
+    ys = []
+    stack = [geojson.get('coordinates')]
+    while stack:
+        coordinates = stack.pop()
+        if not coordinates:
+            continue
+        if isinstance(coordinates[0], (list, tuple)):
+            stack.extend(coordinates)
+        else:
+            xs.append(coordinates[0])
+            ys.append(coordinates[1])
+    if not xs:
+        return None
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+_STRINGS = {}
+
+
+def _intern(string):
+    """Interns a string so equal strings share one instance. Unlike sys.intern,
+    this also works for unicode strings on Python 2."""
+
+    return _STRINGS.setdefault(string, string)
+
+
+_BAND_TUPLES = {}
+_BAND_LAYOUTS = {}
+
+
+def _intern_bands(bands):
+    """Returns a shared tuple of interned band names."""
+
+    bands = tuple(_intern(band) for band in bands)
+    return _BAND_TUPLES.setdefault(bands, bands)
+
+
+class _BandLayout(object):
+    """The bands of a product and the index of the file holding each band,
+    shared between all products with the same files layout."""
+
+    __slots__ = ('file_bands', 'bands', 'index')
+
+    def __init__(self, file_bands):
+
+        self.file_bands = file_bands
+        self.bands = tuple(band for bands in file_bands for band in bands)
+        self.index = {}
+        for position, bands in enumerate(file_bands):
+            for band in bands:
+                self.index.setdefault(band, position)
+
+
+def _band_layout(files):
+    """Returns the shared band layout of a list of EOProductFiles."""
+
+    key = tuple(_intern_bands(file.bands) for file in files)
+    layout = _BAND_LAYOUTS.get(key)
+    if layout is None:
+        layout = _BAND_LAYOUTS.setdefault(key, _BandLayout(key))
+    return layout
 
 
 class EOProduct(object):
-    """This class represents an EO product returned from a catalog search."""
+    """This class represents an EO product returned from a catalog search.
+
+    The geometry and timestamp may be passed as the raw GeoJSON dict and
+    timestamp string of the catalog response; they are then only converted
+    to a shapely geometry and a datetime when first accessed.
+    """
+
+    __slots__ = ('producttype', 'tilex', 'tiley', '_files', '_layout',
+                 '_geometry', '_bbox', '_timestamp')
 
     def __init__(self, producttype=None, tilex=0, tiley=0, files=None, geometry=None,
                  timestamp=None):
@@ -40,12 +141,73 @@ class EOProduct(object):
         self.geometry = geometry
         self._timestamp = timestamp
 
+    def __getstate__(self):
+        return (self.producttype, self.tilex, self.tiley, self._files, self._geometry,
+                self._timestamp)
+
+    def __setstate__(self, state):
+        self.producttype, self.tilex, self.tiley, self.files, self.geometry, self._timestamp = state
+
+    @property
+    def files(self):
+        """
+        The files of this EO Product
+        :return: A list of EOProductFile objects
+        """
+        return self._files
+
+    @files.setter
+    def files(self, files):
+        self._files = files
+        self._layout = None
+
+    def _band_layout(self):
+        # the files list may have been changed in place since the layout was cached;
+        # band tuples are shared, so checking them by identity is cheap
+        files = self._files or ()
+        layout = self._layout
+        if (layout is None or len(layout.file_bands) != len(files)
+                or any(bands is not file.bands for bands, file in zip(layout.file_bands, files))):
+            layout = self._layout = _band_layout(files)
+        return layout
+
+    @property
+    def geometry(self):
+        """
+        The footprint of this EO Product
+        :return: A shapely geometry, or None
+        """
+        if isinstance(self._geometry, dict):
+            from shapely.geometry import shape
+            self._geometry = shape(self._geometry)
+        return self._geometry
+
+    @geometry.setter
+    def geometry(self, geometry):
+        self._geometry = geometry
+        self._bbox = None
+
+    @property
+    def bbox(self):
+        """
+        The bounding box of this EO Product, computed without building a shapely geometry.
+        :return: A (minx, miny, maxx, maxy) tuple, or None
+        """
+        if self._bbox is None and self._geometry is not None:
+            if isinstance(self._geometry, dict):
+                self._bbox = _geojson_bounds(self._geometry)
+            else:
+                self._bbox = self._geometry.bounds
+        return self._bbox
+
     @property
     def timestamp(self):
         """
         The timestamp corresponding to this EO Product
         :return: A datetime object
         """
+        if isinstance(self._timestamp, string_types):
+            self._timestamp = _parse_timestamp(self._timestamp)
         return self._timestamp
 
     def bands(self):
@@ -53,10 +215,7 @@ class EOProduct(object):
         Retrieves all available band names in this product.
         :return: A list of bands.
         """
-        bands = []
-        for file in self.files:
-            bands.extend(file.bands)
-        return bands
+        return list(self._band_layout().bands)
 
     def file(self,band):
         """
@@ -65,11 +224,36 @@ class EOProduct(object):
         :param band: A valid band name.
         :return: A filename, as a string.
         """
-        for file in self.files:
-            if band in file.bands:
-                return file.filename
+        position = self._band_layout().index.get(band)
+        if position is not None:
+            return self._files[position].filename
         raise RuntimeError("Band not found in this product: " + band + ", available bands: " +str(self.bands()))
 
+    def to_dict(self):
+        """
+        Converts this product back to the JSON structure of the catalog response.
+        :return: A dict that can be passed to json.dumps.
+        """
+        dct = {
+            'productType': self.producttype,
+            'tileX': self.tilex,
+            'tileY': self.tiley,
+            'files': [{'filename': file.filename, 'bands': list(file.bands)}
+                      for file in self.files or ()],
+        }
+        if self._geometry is not None:
+            if isinstance(self._geometry, dict):
+                dct['geometry'] = self._geometry
+            else:
+                from shapely.geometry import mapping
+                dct['geometry'] = mapping(self._geometry)
+        if self._timestamp is not None:
+            if isinstance(self._timestamp, string_types):
+                dct['timestamp'] = self._timestamp
+            else:
+                dct['timestamp'] = self._timestamp.strftime(TIMESTAMP_FORMAT)
+        return dct
+
     def __str__(self):
 
         return "{0}_{1}_{2}_{3}".format(self.producttype, self.tilex, self.tiley,
@@ -77,71 +261,507 @@ class EOProduct(object):
 
 
 class EOProductFile(object):
-    """This class represents an EO product file returned from a catalog search."""
+    """This class represents an EO product file returned from a catalog search.
+
+    The directory of the filename and the band names are interned, so they
+    are stored only once for all files sharing them. The bands are therefore
+    returned as a tuple, no longer as the list that was passed in.
+    """
+
+    __slots__ = ('_directory', '_name', '_bands')
 
     def __init__(self, filename, bands):
 
         self.filename = filename
         self.bands = bands
 
+    def __getstate__(self):
+        return (self.filename, self._bands)
+
+    def __setstate__(self, state):
+        self.filename, self.bands = state
+
+    @property
+    def filename(self):
+        """
+        The location of this file
+        :return: A file URI, as a string
+        """
+        return self._directory + self._name
+
+    @filename.setter
+    def filename(self, filename):
+        directory, separator, name = filename.rpartition('/')
+        self._directory = _intern(directory + separator)
+        self._name = name
+
+    @property
+    def bands(self):
+        """
+        The bands stored in this file. This is a shared tuple, not the list passed
+        to the constructor, so compare it with a tuple or convert it with list().
+        :return: A tuple of band names
+        """
+        return self._bands
+
+    @bands.setter
+    def bands(self, bands):
+        self._bands = _intern_bands(bands)
+
     def __str__(self):
 
         return self.filename
 
 
-class Catalog(object):
-    """This class allows searching the catalog."""
+_fromisoformat = getattr(dt, 'fromisoformat', None)
+
+
+def _parse_timestamp(value):
+    """
+    Parses a catalog timestamp in the fixed '%Y-%m-%dT%H:%M:%SZ' format.
+
+    Once the separators are checked, the fields are read with
+    datetime.fromisoformat, or sliced at their fixed offsets on Pythons
+    without it, which is much faster than strptime. Anything not in the exact
+    format is handed to strptime instead.
+
+    :return: A naive datetime object.
+    """
+    if (len(value) == 20 and value[4] == '-' and value[7] == '-' and value[10] == 'T'
+            and value[13] == ':' and value[16] == ':' and value[19] == 'Z'):
+        try:
+            if _fromisoformat is not None:
+                return _fromisoformat(value[:19])
+            if (value[0:4] + value[5:7] + value[8:10] + value[11:13]
+                    + value[14:16] + value[17:19]).isdigit():
+                return dt(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                          int(value[11:13]), int(value[14:16]), int(value[17:19]))
+        except ValueError:
+            pass
+    return dt.strptime(value, TIMESTAMP_FORMAT)
+
+
+def _as_date(value):
+    """Truncates a date or datetime to a date."""
+
+    if isinstance(value, dt):
+        return value.date()
+    return value
+
+
+def _date_windows(startdate, enddate, window):
+    """
+    Splits an inclusive date range in consecutive, non overlapping windows.
+
+    :param window: 'month', 'year', or the window length as a number of days or a timedelta.
+    :return: A list of inclusive (start, end) date tuples.
+    """
+    if isinstance(window, int):
+        window = timedelta(days=window)
+    if isinstance(window, timedelta) and window < timedelta(days=1):
+        raise ValueError("window must span at least one day")
+
+    windows = []
+    start = startdate
+    while start <= enddate:
+        if window == 'month':
+            if start.month == 12:
+                next_start = date(start.year + 1, 1, 1)
+            else:
+                next_start = date(start.year, start.month + 1, 1)
+        elif window == 'year':
+            next_start = date(start.year + 1, 1, 1)
+        elif isinstance(window, timedelta):
+            next_start = start + timedelta(days=window.days)
+        else:
+            raise ValueError("unsupported window: " + str(window))
+        end = min(next_start - timedelta(days=1), enddate)
+        windows.append((start, end))
+        start = next_start
+    return windows
+
+
+def _parse_bound(value):
+    """
+    Converts a date argument like Catalog.convert_date, except that date strings
+    without a time, such as '2016-01-11', become dates instead of midnight.
+    """
+    if isinstance(value, string_types):
+        for date_format in ('%Y-%m-%d', '%Y%m%d'):
+            try:
+                return dt.strptime(value.strip(), date_format).date()
+            except ValueError:
+                pass
+    return Catalog.convert_date(value)
+
+
+def _naive_utc(value):
+    """Converts a date or datetime to a naive UTC datetime, like product timestamps."""
+
+    if not isinstance(value, dt):
+        return dt.combine(value, dt.min.time())
+    if value.tzinfo is not None:
+        value = value.astimezone(utc).replace(tzinfo=None)
+    return value
+
+
+def _is_historical(enddate):
+    """Tells whether a search ending at enddate only covers data that no longer changes."""
+
+    if enddate is None:
+        return False
+    enddate = _as_date(Catalog.convert_date(enddate))
+    return enddate < date.today() - timedelta(days=HISTORICAL_AGE_DAYS)
+
+
+def _product_key(product):
+    """Identifies a product independently of the query that returned it."""
+
+    return (product.producttype, product.tilex, product.tiley, product.timestamp,
+            tuple(file.filename for file in product.files))
 
-    def __init__(self, baseurl=CATALOG_BASE_URL):
+
+class _Flight(object):
+    """This class holds the outcome of a call shared by identical concurrent calls."""
+
+    __slots__ = ('done', 'result', 'error', 'status')
+
+    def __init__(self):
+
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.status = None
+
+
+class Catalog(object):
+    """This class allows searching the catalog.
+
+    All requests go through a single pooled :class:`requests.Session`, so
+    connections to the catalog are kept alive and reused between calls. The
+    session is created on first use and can be shared between threads. Use
+    the catalog as a context manager, or call :meth:`close`, to release the
+    pooled connections.
+
+    :param baseurl: The base URL of the catalog REST service.
+    :param session: An optional preconfigured session; it is not closed by :meth:`close`.
+        A pickled catalog keeps only its configuration, and creates a new session.
+    :param pool_size: The maximum number of pooled connections to keep per host.
+    :param keep_alive: Whether connections are kept alive between requests.
+    :param timeout: Request timeout in seconds, either a single number or a
+        (connect, read) tuple. None disables the timeout.
+    :param max_retries: The number of retries on connection errors.
+    :param cache: An optional catalogclient.cache.ResponseCache for the responses.
+    :param scheduler: An optional catalogclient.scheduler.RequestScheduler, which may be
+        shared with other catalogs, to limit concurrency and retry overloaded requests.
+    :param metrics: An optional callable receiving a catalogclient.metrics.CallMetrics
+        after each call, such as a catalogclient.metrics.MetricsAggregator.
+    :param decoder: A callable decoding JSON from the response bytes, or the name of
+        a decoder known to :func:`catalogclient.decoding.get_decoder`. By default
+        the fastest installed decoder is used.
+    :param coalesce: Whether identical calls made at the same time from several
+        threads share one request and one result. Every caller receives its own
+        list, but the EOProducts in it are shared.
+    """
+
+    def __init__(self, baseurl=CATALOG_BASE_URL, session=None, pool_size=DEFAULT_POOL_SIZE,
+                 keep_alive=True, timeout=DEFAULT_TIMEOUT, max_retries=0, cache=None,
+                 scheduler=None, metrics=None, decoder=None, coalesce=True):
 
         self.baseurl = baseurl
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = cache
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self._decoder = decoder
+        self.coalesce = coalesce
+        self.coalesced = 0
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._session = session
+        self._owns_session = session is None
+        self._session_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_flights', '_flights_lock', '_session', '_session_lock'):
+            del state[name]
+        state['_owns_session'] = True
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
+    @property
+    def session(self):
+        """
+        The pooled session used for all catalog requests.
+        :return: A requests.Session object
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    @property
+    def decoder(self):
+        """
+        The JSON decoder used for all catalog responses.
+        :return: A callable taking bytes
+        """
+        if not callable(self._decoder):
+            from catalogclient.decoding import get_decoder
+            self._decoder = get_decoder(self._decoder)
+        return self._decoder
+
+    def _create_session(self):
+        """Creates a session with a connection pool sized for this catalog."""
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        from catalogclient.decoding import accept_encoding
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size,
+                              max_retries=self.max_retries)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['Accept-Encoding'] = accept_encoding()
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def close(self):
+        """Closes the pooled connections, unless the session was passed in by the caller."""
+
+        with self._session_lock:
+            if self._session is not None and self._owns_session:
+                self._session.close()
+                self._session = None
+
+    def _get(self, url, params=None, headers=None, stream=False):
+        """Performs a GET request on the pooled session, through the scheduler if there is one."""
+
+        def send():
+            return self.session.get(url, params=params, headers=headers, timeout=self.timeout,
+                                    stream=stream)
+
+        if self.scheduler is None:
+            return send()
+        return self.scheduler.execute(send)
+
+    def _get_json(self, endpoint, url, params=None, headers=None, call=None):
+        """
+        Performs a GET request and returns the decoded JSON body, using the
+        response cache when one is configured.
+
+        :param endpoint: The endpoint name, selecting the time-to-live of cached responses.
+        :param call: The CallMetrics recording the cost of the request.
+        """
+        import requests
+
+        if call is None:
+            call = CallMetrics(endpoint, url)
+
+        entry = None
+        if self.cache is not None:
+            from catalogclient.cache import CacheEntry, cache_key
+
+            key = cache_key(url, params)
+            entry, fresh = self.cache.get(endpoint, key)
+            if fresh:
+                call.cache = 'hit'
+                return self._decode(call, entry)
+
+            headers = dict(headers or {})
+            if entry is not None:
+                if entry.etag:
+                    headers['If-None-Match'] = entry.etag
+                if entry.last_modified:
+                    headers['If-Modified-Since'] = entry.last_modified
+
+        response = self._fetch(call, url, params, headers)
+        if entry is not None and response.status_code == requests.codes.not_modified:
+            call.cache = 'revalidated'
+            entry = CacheEntry(entry.content, entry.etag, entry.last_modified)
+            self.cache.put(key, entry)
+            return self._decode(call, entry)
+        if response.status_code == requests.codes.ok:
+            if self.cache is not None:
+                call.cache = 'miss'
+                self.cache.put(key, CacheEntry(response.content, response.headers.get('ETag'),
+                                               response.headers.get('Last-Modified')))
+            return self._decode(call, response)
+        else:
+            self._report(call)
+            response.raise_for_status()
+
+    def _fetch(self, call, url, params=None, headers=None):
+        """Performs a GET request, timing the request and, with metrics enabled, the transfer."""
+
+        start = _clock()
+        response = self._get(url, params=params, headers=headers, stream=self.metrics is not None)
+        call.request = _clock() - start
+        call.status = response.status_code
+        if self.metrics is not None:
+            start = _clock()
+            call.response_bytes = len(response.content)
+            call.transfer = _clock() - start
+        return response
+
+    def _decode(self, call, response):
+        """Decodes the body of a response or cache entry, timing the decoding."""
+
+        start = _clock()
+        json = self.decoder(response.content)
+        call.decode = _clock() - start
+        return json
+
+    def _finish(self, call, build, json):
+        """Builds the result of a call from the decoded JSON and reports the call metrics."""
+
+        start = _clock()
+        result = build(json)
+        call.build = _clock() - start
+        call.items = len(result)
+        self._report(call)
+        return result
+
+    def _call(self, method, endpoint, url, build, params=None, headers=None):
+        """
+        Performs a call and builds its result. With coalescing enabled, a call
+        identical to one in flight waits for it and shares its result.
+
+        :param method: The name of the Catalog method, for the metrics.
+        :param build: The function building the result from the decoded JSON.
+        """
+        def perform(call):
+            return self._finish(call, build, self._get_json(endpoint, url, params=params,
+                                                            headers=headers, call=call))
+
+        if not self.coalesce:
+            return perform(CallMetrics(method, url))
+
+        key = (method, url, tuple(sorted((params or {}).items())))
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return self._follow(CallMetrics(method, url), flight)
+
+        call = CallMetrics(method, url)
+        try:
+            flight.result = perform(call)
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            flight.status = call.status
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def _follow(self, call, flight):
+        """Waits for the outcome of an identical call in flight, reporting the wait."""
+
+        call.cache = 'coalesced'
+        start = _clock()
+        flight.done.wait()
+        call.request = _clock() - start
+        call.status = flight.status
+        if flight.error is not None:
+            self._report(call)
+            raise flight.error
+        result = flight.result
+        if isinstance(result, list):
+            result = list(result)
+        call.items = len(result)
+        self._report(call)
+        return result
+
+    def _report(self, call):
+        if self.metrics is not None:
+            self.metrics(call)
+
+    @staticmethod
+    def _build_product(a):
+        """Builds an EOProduct object from a dict."""
+
+        return EOProduct(a['productType'],
+                         a['tileX'],
+                         a['tileY'],
+                         list(map(lambda b: EOProductFile(b['filename'],
+                                                          b['bands']), a['files'])),
+                         a.get('geometry'),
+                         a.get('timestamp'))
 
     @staticmethod
     def _build_products(json):
         """Builds EOProduct objects from a dict."""
 
-        return list(map(
-            lambda a: EOProduct(a['productType'],
-                                a['tileX'],
-                                a['tileY'],
-                                list(map(lambda b: EOProductFile(b['filename'],
-                                                            b['bands']), a['files'])),
-                                shape(a['geometry']) if 'geometry' in a else None,
-                                dt.strptime(a['timestamp'],
-                                            '%Y-%m-%dT%H:%M:%SZ') if 'timestamp' in a else None),
-            json))
+        return list(map(Catalog._build_product, json))
 
     @staticmethod
     def _build_times(json):
         """Builds datetime objects from a dict."""
 
-        return list(map(
-            lambda a: dt.strptime(a, '%Y-%m-%dT%H:%M:%SZ'), json))
+        return list(map(_parse_timestamp, json))
 
 
     def get_producttypes(self):
         """Returns the list of available product types."""
 
         headers = {'Accept': 'application/json'}
-        response = requests.get(self.baseurl, headers=headers)
-        if response.status_code == requests.codes.ok:
-            return response.json()
-        else:
-            response.raise_for_status()
+        return self._call('get_producttypes', 'producttypes', self.baseurl, list,
+                          headers=headers)
 
 
-    def get_products(self, producttype, fileformat='HDF5', startdate=None, enddate=None,
-                     min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
-        """Returns EOProducts for specified product type, file format, region of interest
-        and date range."""
+    @staticmethod
+    def _bbox_params(params, min_lon, max_lon, min_lat, max_lat):
+        """Adds the region of interest to a dict of query parameters."""
+
+        if min_lon != None:
+            params['minLon'] = min_lon
+        if max_lon != None:
+            params['maxLon'] = max_lon
+        if min_lat != None:
+            params['minLat'] = min_lat
+        if max_lat != None:
+            params['maxLat'] = max_lat
+        return params
+
+    @staticmethod
+    def _products_query(baseurl, producttype, fileformat='HDF5', startdate=None, enddate=None,
+                        min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Builds the url and query parameters of a products search by date range."""
 
         if producttype is None:
             raise ValueError("producttype is mandatory")
         if fileformat is None:
             raise ValueError("fileformat is mandatory")
 
-        url = urljoin(self.baseurl, producttype)
+        url = urljoin(baseurl, producttype)
 
         params = {
             'format': str(fileformat),
@@ -151,69 +771,168 @@ class Catalog(object):
             params['startDate'] = Catalog.convert_date(startdate).strftime('%Y%m%d')
         if enddate != None:
             params['endDate'] = Catalog.convert_date(enddate).strftime('%Y%m%d')
-        if min_lon != None:
-            params['minLon'] = min_lon
-        if max_lon != None:
-            params['maxLon'] = max_lon
-        if min_lat != None:
-            params['minLat'] = min_lat
-        if max_lat != None:
-            params['maxLat'] = max_lat
 
-        response = requests.get(url, params=params)
-        if response.status_code == requests.codes.ok:
-            return self._build_products(response.json())
-        else:
-            response.raise_for_status()
+        return url, Catalog._bbox_params(params, min_lon, max_lon, min_lat, max_lat)
 
-    def get_products_for_year(self, producttype, year, fileformat='HDF5',
-                              min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
-        """Returns EOProducts for specified product type, file format,
-        region of interest and year."""
+    @staticmethod
+    def _products_for_year_query(baseurl, producttype, year, fileformat='HDF5',
+                                 min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Builds the url and query parameters of a products search by year."""
 
         if producttype is None:
             raise ValueError("producttype is mandatory")
         if fileformat is None:
             raise ValueError("fileformat is mandatory")
 
-        url = urljoin(self.baseurl, producttype)
+        url = urljoin(baseurl, producttype)
 
         params = {
             'format': str(fileformat),
             'year': str(year)
         }
 
-        if min_lon != None:
-            params['minLon'] = min_lon
-        if max_lon != None:
-            params['maxLon'] = max_lon
-        if min_lat != None:
-            params['minLat'] = min_lat
-        if max_lat != None:
-            params['maxLat'] = max_lat
+        return url, Catalog._bbox_params(params, min_lon, max_lon, min_lat, max_lat)
 
-        response = requests.get(url, params=params)
-        if response.status_code == requests.codes.ok:
-            return self._build_products(response.json())
-        else:
-            response.raise_for_status()
+    @staticmethod
+    def _times_url(baseurl, producttype):
+        """Builds the url listing the available dates of a product type."""
+
+        if producttype is None:
+            raise ValueError("producttype is mandatory")
+
+        return urljoin(baseurl, producttype + '/times')
+
+    def get_products(self, producttype, fileformat='HDF5', startdate=None, enddate=None,
+                     min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Returns EOProducts for specified product type, file format, region of interest
+        and date range."""
+
+        url, params = self._products_query(self.baseurl, producttype, fileformat,
+                                           startdate, enddate,
+                                           min_lon, max_lon, min_lat, max_lat)
+
+        endpoint = 'products_historical' if _is_historical(enddate) else 'products'
+        return self._call('get_products', endpoint, url, self._build_products, params)
+
+    def get_products_for_year(self, producttype, year, fileformat='HDF5',
+                              min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Returns EOProducts for specified product type, file format,
+        region of interest and year."""
+
+        url, params = self._products_for_year_query(self.baseurl, producttype, year, fileformat,
+                                                    min_lon, max_lon, min_lat, max_lat)
+
+        endpoint = 'products_historical' if _is_historical(date(int(year), 12, 31)) else 'products'
+        return self._call('get_products_for_year', endpoint, url, self._build_products, params)
+
+    def get_product_collection(self, producttype, fileformat='HDF5', startdate=None,
+                               enddate=None, min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """
+        Returns the products for specified product type, file format, region of interest
+        and date range as a columnar ProductCollection, without building EOProduct objects.
+        Requires the optional numpy package.
+
+        :return: A catalogclient.collection.ProductCollection.
+        """
+        from catalogclient.collection import ProductCollection
+
+        url, params = self._products_query(self.baseurl, producttype, fileformat,
+                                           startdate, enddate,
+                                           min_lon, max_lon, min_lat, max_lat)
+
+        endpoint = 'products_historical' if _is_historical(enddate) else 'products'
+        return self._call('get_product_collection', endpoint, url, ProductCollection.from_json,
+                          params)
+
+    def iter_products(self, producttype, fileformat='HDF5', startdate=None, enddate=None,
+                      min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """
+        Yields EOProducts for specified product type, file format, region of interest
+        and date range while the response is being received.
+
+        The response is parsed incrementally when the optional ijson package is
+        installed, so memory use does not grow with the number of products.
+        Without ijson, the response is decoded at once, as in :meth:`get_products`.
+
+        :return: A generator of EOProducts.
+        """
+        url, params = self._products_query(self.baseurl, producttype, fileformat,
+                                           startdate, enddate,
+                                           min_lon, max_lon, min_lat, max_lat)
+
+        import requests
+        try:
+            import ijson
+        except ImportError:
+            ijson = None
+
+        response = self._get(url, params=params, stream=True)
+        try:
+            if response.status_code != requests.codes.ok:
+                response.raise_for_status()
+            if ijson is None:
+                items = self.decoder(response.content)
+            else:
+                response.raw.decode_content = True
+                items = ijson.items(response.raw, 'item', use_float=True)
+            for item in items:
+                yield self._build_product(item)
+        finally:
+            response.close()
+
+    def get_products_sharded(self, producttype, fileformat='HDF5', startdate=None, enddate=None,
+                             min_lon=-180, max_lon=180, min_lat=-90, max_lat=90,
+                             window='month', max_workers=DEFAULT_SHARD_WORKERS):
+        """
+        Returns EOProducts for specified product type, file format, region of interest
+        and date range, splitting the date range in windows that are searched in parallel.
+
+        Windows covering a whole calendar year are searched with :meth:`get_products_for_year`.
+        Products returned by more than one window are only returned once. The
+        arguments are those of :meth:`get_products`, but both dates are mandatory.
+
+        :param window: 'month', 'year', or the window length as a number of days or a timedelta.
+        :param max_workers: The number of windows searched at the same time.
+        :return: A list of EOProducts, sorted by timestamp.
+        """
+        if startdate is None or enddate is None:
+            raise ValueError("startdate and enddate are mandatory")
+
+        startdate = _as_date(Catalog.convert_date(startdate))
+        enddate = _as_date(Catalog.convert_date(enddate))
+        bbox = (min_lon, max_lon, min_lat, max_lat)
+
+        def search(window_range):
+            start, end = window_range
+            if start == date(start.year, 1, 1) and end == date(start.year, 12, 31):
+                return self.get_products_for_year(producttype, start.year, fileformat, *bbox)
+            return self.get_products(producttype, fileformat, start, end, *bbox)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(search, _date_windows(startdate, enddate, window)))
+
+        seen = set()
+        products = []
+        for result in results:
+            for product in result:
+                key = _product_key(product)
+                if key not in seen:
+                    seen.add(key)
+                    products.append(product)
+        products.sort(key=lambda product: (product.timestamp is None, product.timestamp or dt.min))
+        return products
 
     @classmethod
     def convert_date(cls, date):
-        if type(date) is str:
+        if isinstance(date, string_types):
+            from dateutil import parser
             return parser.parse(date).replace(tzinfo=utc)
         return date
 
     def get_times(self, producttype):
         """Returns a list of dates at which a product is available in the catalog."""
 
-        if producttype is None:
-            raise ValueError("producttype is mandatory")
-
-        url = urljoin(self.baseurl, producttype + '/times')
-
-        response = requests.get(url)
-        if response.status_code == requests.codes.ok:
-            return self._build_times(response.json())
-        else:
-            response.raise_for_status()
+        url = self._times_url(self.baseurl, producttype)
+        return self._call('get_times', 'times', url, self._build_times)
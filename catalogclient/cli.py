@@ -0,0 +1,128 @@
+"""Runs a batch of catalog searches and writes the products found as NDJSON.
+
+The searches are read from a file, or standard input, with one JSON object
+per line, for example:
+
+    {"producttype": "PROBAV_L3_S10_TOC_333M", "fileformat": "GEOTIFF",
+     "startdate": "2016-01-01", "enddate": "2016-01-31", "bbox": [4.0, 6.5, 50.5, 51.5]}
+    {"producttype": "BioPar_NDVI300_V1_Global", "fileformat": "NETCDF", "year": 2017}
+
+The bbox is (min_lon, max_lon, min_lat, max_lat). The searches run
+concurrently; every product is written to standard output as soon as it is
+parsed, and the timing of each search is reported on standard error.
+"""
+
+import argparse
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from catalogclient.catalog import Catalog, CATALOG_BASE_URL, _clock
+
+DEFAULT_WORKERS = 4
+
+
+def _queries(lines):
+    """Parses the non-empty lines of a query file."""
+
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                query = json.loads(line)
+            except ValueError as error:
+                raise ValueError("line {}: {}".format(number, error))
+            if 'producttype' not in query:
+                raise ValueError("line {}: producttype is mandatory".format(number))
+            yield query
+
+
+def _search(catalog, query):
+    """Streams the products of a query; a year is searched as the date range covering it."""
+
+    fileformat = query.get('fileformat', 'HDF5')
+    bbox = tuple(query.get('bbox', (-180, 180, -90, 90)))
+    if 'year' in query:
+        year = int(query['year'])
+        startdate, enddate = date(year, 1, 1), date(year, 12, 31)
+    else:
+        startdate, enddate = query.get('startdate'), query.get('enddate')
+    return catalog.iter_products(query['producttype'], fileformat, startdate, enddate, *bbox)
+
+
+def _describe(query):
+    if 'year' in query:
+        period = str(query['year'])
+    else:
+        period = '{}..{}'.format(query.get('startdate') or '', query.get('enddate') or '')
+    return '{} {}'.format(query['producttype'], period)
+
+
+def run(catalog, queries, output, log, max_workers=DEFAULT_WORKERS):
+    """
+    Runs catalog searches concurrently, writing the products found as NDJSON.
+
+    :param catalog: The Catalog to search.
+    :param queries: An iterable of query dicts.
+    :param output: The text stream receiving one JSON product per line.
+    :param log: The text stream receiving the timing, or the error, of every search.
+    :param max_workers: The number of searches running at the same time.
+    :return: The number of failed searches.
+    """
+    lock = threading.Lock()
+
+    def execute(position, query):
+        start = _clock()
+        count = 0
+        try:
+            for product in _search(catalog, query):
+                line = json.dumps(product.to_dict())
+                with lock:
+                    output.write(line)
+                    output.write('\n')
+                count += 1
+        except Exception as error:
+            with lock:
+                log.write('query {} {}: failed after {:.3f} s: {}\n'.format(
+                    position, _describe(query), _clock() - start, error))
+            return False
+        with lock:
+            log.write('query {} {}: {} products in {:.3f} s\n'.format(
+                position, _describe(query), count, _clock() - start))
+        return True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(execute, position, query)
+                   for position, query in enumerate(queries, 1)]
+    return sum(1 for future in futures if not future.result())
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(prog='catalogclient',
+                                        description=__doc__.splitlines()[0])
+    arguments.add_argument('queries', nargs='?', default='-',
+                           help="file with one JSON query per line; '-' reads standard input")
+    arguments.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                           help="number of searches running at the same time")
+    arguments.add_argument('--baseurl', default=CATALOG_BASE_URL,
+                           help="base URL of the catalog REST service")
+    args = arguments.parse_args(argv)
+
+    source = sys.stdin if args.queries == '-' else open(args.queries)
+    try:
+        queries = list(_queries(source))
+    except ValueError as error:
+        arguments.error(str(error))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    with Catalog(args.baseurl, pool_size=max(args.workers, 1)) as catalog:
+        failed = run(catalog, queries, sys.stdout, sys.stderr, args.workers)
+    sys.stdout.flush()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,316 @@
+"""This module provides a columnar container for catalog search results,
+ backed by NumPy arrays. It requires the optional numpy package."""
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from catalogclient.catalog import (EOProduct, EOProductFile, string_types, _naive_utc,
+                                   _parse_bound)
+
+_NAT = np.datetime64('NaT', 's')
+
+
+def _to_datetime64(value):
+    """Converts a catalog timestamp string, datetime or None to a numpy datetime64."""
+
+    if value is None:
+        return _NAT
+    if isinstance(value, string_types):
+        value = value.rstrip('Z')
+    return np.datetime64(value, 's')
+
+
+def _take_ranges(offsets, indices):
+    """
+    Selects variable length ranges from an offset-indexed array.
+
+    :param offsets: The offsets of the ranges, with one extra element marking the end.
+    :param indices: The indices of the ranges to select.
+    :return: The offsets of the selected ranges and the positions of their elements.
+    """
+    starts = offsets[indices]
+    lengths = offsets[indices + 1] - starts
+    new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    positions = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return new_offsets, positions
+
+
+class _Column(object):
+    """This descriptor holds a column of a ProductCollection, which may be
+    given as a callable that loads the column on first access."""
+
+    def __init__(self, name):
+
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance._columns[self.name] # pylint: disable=W0212
+        if callable(value):
+            value = instance._columns[self.name] = value() # pylint: disable=W0212
+        return value
+
+    def __set__(self, instance, value):
+        instance._columns[self.name] = value # pylint: disable=W0212
+
+
+class ProductCollection(object):
+    """This class holds EO products returned from a catalog search as columns.
+
+    The product type, tile indices, timestamp and bounding box are stored as
+    NumPy arrays; the files and their bands as flat arrays indexed by
+    offsets. This allows vectorised filtering of large search results, while
+    iterating still yields :class:`catalogclient.catalog.EOProduct` objects.
+
+    Any column may be passed as a callable returning the array, which is
+    then only loaded when the column is first used.
+    """
+
+    producttype = _Column('producttype')
+    tilex = _Column('tilex')
+    tiley = _Column('tiley')
+    timestamp = _Column('timestamp')
+    bbox = _Column('bbox')
+    geometries = _Column('geometries')
+    file_offsets = _Column('file_offsets')
+    filenames = _Column('filenames')
+    band_offsets = _Column('band_offsets')
+    band_codes = _Column('band_codes')
+
+    def __init__(self, producttype, tilex, tiley, timestamp, bbox, geometries,
+                 file_offsets, filenames, band_offsets, band_codes, band_names):
+
+        self._columns = {}
+        self.producttype = producttype
+        self.tilex = tilex
+        self.tiley = tiley
+        self.timestamp = timestamp
+        self.bbox = bbox
+        self.geometries = geometries
+        self.file_offsets = file_offsets
+        self.filenames = filenames
+        self.band_offsets = band_offsets
+        self.band_codes = band_codes
+        self.band_names = band_names
+
+    @classmethod
+    def from_json(cls, json):
+        """Builds a collection from the decoded JSON response of a products search."""
+
+        return cls._build(
+            (a['productType'], a['tileX'], a['tileY'],
+             [(b['filename'], b['bands']) for b in a['files']],
+             a.get('geometry'), a.get('timestamp'))
+            for a in json)
+
+    @classmethod
+    def from_products(cls, products):
+        """Builds a collection from EOProduct objects."""
+
+        return cls._build(
+            (p.producttype, p.tilex, p.tiley,
+             [(f.filename, f.bands) for f in p.files or ()],
+             p._geometry, p._timestamp) # pylint: disable=W0212
+            for p in products)
+
+    @classmethod
+    def _build(cls, rows):
+        """Builds a collection from (producttype, tilex, tiley, files, geometry, timestamp) rows."""
+
+        producttypes = []
+        tilexs = []
+        tileys = []
+        timestamps = []
+        geometries = []
+        file_offsets = [0]
+        filenames = []
+        band_offsets = [0]
+        band_codes = []
+        band_names = []
+        band_index = {}
+
+        for producttype, tilex, tiley, files, geometry, timestamp in rows:
+            producttypes.append(producttype)
+            tilexs.append(tilex)
+            tileys.append(tiley)
+            timestamps.append(_to_datetime64(timestamp))
+            geometries.append(geometry)
+            for filename, bands in files:
+                filenames.append(filename)
+                for band in bands:
+                    code = band_index.get(band)
+                    if code is None:
+                        code = band_index[band] = len(band_names)
+                        band_names.append(band)
+                    band_codes.append(code)
+                band_offsets.append(len(band_codes))
+            file_offsets.append(len(filenames))
+
+        geometries_array = np.empty(len(geometries), dtype=object)
+        geometries_array[:] = geometries
+        collection = cls(np.array(producttypes, dtype=object),
+                         np.array(tilexs, dtype=np.int32),
+                         np.array(tileys, dtype=np.int32),
+                         np.array(timestamps, dtype='datetime64[s]'),
+                         None,
+                         geometries_array,
+                         np.array(file_offsets, dtype=np.int64),
+                         np.array(filenames, dtype=object),
+                         np.array(band_offsets, dtype=np.int64),
+                         np.array(band_codes, dtype=np.int32),
+                         band_names)
+        collection.bbox = collection._compute_bbox()
+        return collection
+
+    def _compute_bbox(self):
+        """Computes the (minx, miny, maxx, maxy) column from the geometries."""
+
+        bbox = np.full((len(self), 4), np.nan)
+        for i, geometry in enumerate(self.geometries):
+            if geometry is not None:
+                bounds = EOProduct(geometry=geometry).bbox
+                if bounds is not None:
+                    bbox[i] = bounds
+        return bbox
+
+    def __len__(self):
+        return len(self.tilex)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._product(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError("product index out of range")
+            return self._product(key)
+        return self.take(np.arange(len(self))[key])
+
+    def _product(self, i):
+        """Builds an EOProduct view of the product at position i."""
+
+        files = []
+        for f in range(self.file_offsets[i], self.file_offsets[i + 1]):
+            codes = self.band_codes[self.band_offsets[f]:self.band_offsets[f + 1]]
+            files.append(EOProductFile(self.filenames[f], [self.band_names[c] for c in codes]))
+        return EOProduct(self.producttype[i], int(self.tilex[i]), int(self.tiley[i]), files,
+                         self.geometries[i], self.timestamp[i].item())
+
+    def take(self, indices):
+        """
+        Selects products by position.
+
+        :param indices: An array of product positions.
+        :return: A new ProductCollection.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        file_offsets, file_positions = _take_ranges(self.file_offsets, indices)
+        band_offsets, band_positions = _take_ranges(self.band_offsets, file_positions)
+        return ProductCollection(self.producttype[indices],
+                                 self.tilex[indices],
+                                 self.tiley[indices],
+                                 self.timestamp[indices],
+                                 self.bbox[indices],
+                                 self.geometries[indices],
+                                 file_offsets,
+                                 self.filenames[file_positions],
+                                 band_offsets,
+                                 self.band_codes[band_positions],
+                                 self.band_names)
+
+    def band_mask(self, band):
+        """
+        Returns a boolean array telling which products have a given band.
+
+        :param band: A band name.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        if band not in self.band_names:
+            return mask
+        code = self.band_names.index(band)
+        band_files = np.repeat(np.arange(len(self.filenames)), np.diff(self.band_offsets))
+        matching_files = band_files[self.band_codes == code]
+        mask[np.searchsorted(self.file_offsets, matching_files, side='right') - 1] = True
+        return mask
+
+    def filter(self, producttype=None, tile=None, time_range=None, band=None, bbox=None):
+        """
+        Selects the products matching all given criteria.
+
+        :param producttype: A product type name.
+        :param tile: A (tilex, tiley) tuple.
+        :param time_range: An inclusive (start, end) tuple of datetimes, dates or date
+            strings; either bound may be None. A date end, or a date string without a
+            time, includes the whole day.
+        :param band: A band name the products should have.
+        :param bbox: A (minx, miny, maxx, maxy) tuple the product bounding boxes should intersect.
+        :return: A new ProductCollection.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if producttype is not None:
+            mask &= self.producttype == producttype
+        if tile is not None:
+            mask &= (self.tilex == tile[0]) & (self.tiley == tile[1])
+        if time_range is not None:
+            start, end = time_range
+            if start is not None:
+                mask &= self.timestamp >= _to_datetime64(_naive_utc(_parse_bound(start)))
+            if end is not None:
+                end = _parse_bound(end)
+                if isinstance(end, date) and not isinstance(end, datetime):
+                    mask &= self.timestamp < _to_datetime64(end + timedelta(days=1))
+                else:
+                    mask &= self.timestamp <= _to_datetime64(_naive_utc(end))
+        if band is not None:
+            mask &= self.band_mask(band)
+        if bbox is not None:
+            mask &= ((self.bbox[:, 0] <= bbox[2]) & (self.bbox[:, 2] >= bbox[0])
+                     & (self.bbox[:, 1] <= bbox[3]) & (self.bbox[:, 3] >= bbox[1]))
+        return self.take(np.flatnonzero(mask))
+
+    def groupby_tile(self):
+        """
+        Splits the collection per tile.
+
+        :return: A dict mapping (tilex, tiley) tuples to ProductCollections.
+        """
+        tiles = np.stack([self.tilex, self.tiley], axis=1)
+        unique, inverse = np.unique(tiles, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(unique) + 1))
+        return dict(((int(x), int(y)), self.take(order[bounds[i]:bounds[i + 1]]))
+                    for i, (x, y) in enumerate(unique))
+
+    def to_pandas(self):
+        """
+        Returns the product columns as a pandas DataFrame, without copying them.
+        Requires the optional pandas package.
+        """
+        import pandas as pd
+
+        return pd.DataFrame({'producttype': self.producttype,
+                             'tilex': self.tilex,
+                             'tiley': self.tiley,
+                             'timestamp': self.timestamp,
+                             'minx': self.bbox[:, 0],
+                             'miny': self.bbox[:, 1],
+                             'maxx': self.bbox[:, 2],
+                             'maxy': self.bbox[:, 3]}, copy=False)
+
+    def to_geopandas(self):
+        """
+        Returns the product columns and geometries as a geopandas GeoDataFrame.
+        Requires the optional geopandas package.
+        """
+        import geopandas as gpd
+        from shapely.geometry import shape
+
+        geometries = [shape(g) if isinstance(g, dict) else g for g in self.geometries]
+        return gpd.GeoDataFrame(self.to_pandas(), geometry=geometries, crs='EPSG:4326')
@@ -0,0 +1,78 @@
+"""This module picks the JSON decoder and the compressed transfer encodings
+ used for catalog responses. The optional orjson or pysimdjson packages
+ are used when installed; both decode straight from the response bytes."""
+
+DECODERS = ('orjson', 'simdjson', 'json')
+
+_default_decoder = None
+
+
+def _orjson():
+    import orjson
+    return orjson.loads
+
+
+def _simdjson():
+    import simdjson
+    return simdjson.loads
+
+
+def _json_loads(content):
+    import json
+
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    return json.loads(content)
+
+
+def _json():
+    return _json_loads
+
+
+_FACTORIES = {
+    'orjson': _orjson,
+    'simdjson': _simdjson,
+    'json': _json,
+}
+
+
+def get_decoder(name=None):
+    """
+    Returns a function decoding a JSON document from bytes.
+
+    :param name: 'orjson', 'simdjson' or 'json'. By default the first of these
+        that is installed, in that order.
+    :return: A callable taking bytes and returning the decoded document.
+    """
+    global _default_decoder
+
+    if name is not None:
+        try:
+            return _FACTORIES[name]()
+        except KeyError:
+            raise ValueError("unsupported JSON decoder: " + str(name))
+    if _default_decoder is None:
+        for candidate in DECODERS:
+            try:
+                _default_decoder = _FACTORIES[candidate]()
+                break
+            except ImportError:
+                continue
+    return _default_decoder
+
+
+def accept_encoding():
+    """
+    Returns the Accept-Encoding header value for the compressed transfer
+    encodings that can be decoded: gzip and deflate, and brotli when the
+    optional brotli or brotlicffi package is installed.
+    """
+    encodings = ['gzip', 'deflate']
+    for module in ('brotli', 'brotlicffi'):
+        try:
+            __import__(module)
+            encodings.append('br')
+            break
+        except ImportError:
+            continue
+    return ', '.join(encodings)
@@ -0,0 +1,251 @@
+"""This module provides in-process indexes over products fetched from the catalog,
+ so repeated searches can be answered without querying the catalog again."""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime as dt, timedelta
+
+from shapely.geometry import box
+
+from catalogclient.catalog import Catalog, _as_date, _naive_utc, _parse_bound
+
+try:
+    from shapely.strtree import STRtree
+except ImportError:
+    STRtree = None
+
+
+class SpatioTemporalIndex(object):
+    """This class answers product searches by region of interest and date range locally.
+
+    The products are kept in time order, with an STRtree over their
+    geometries. A search selects the products whose geometry intersects the
+    region of interest (touching counts, like the catalog) and whose
+    timestamp falls on a day within the inclusive date range. Products
+    without a geometry match every region, products without a timestamp
+    only match searches without a date range.
+
+    :param products: The EOProducts to index.
+    :param coverage: An optional (startdate, enddate, min_lon, max_lon, min_lat, max_lat)
+        tuple describing the search that returned the products; searches
+        outside of it raise a ValueError. None elements are unbounded.
+    """
+
+    def __init__(self, products, coverage=None):
+
+        if STRtree is None:
+            raise ImportError("SpatioTemporalIndex requires shapely >= 1.6")
+
+        self.coverage = coverage
+        self.products = sorted(products, key=lambda p: (p.timestamp is None,
+                                                        p.timestamp or dt.min))
+        self._times = [p.timestamp for p in self.products if p.timestamp is not None]
+        self._unlocated = [i for i, p in enumerate(self.products) if p.bbox is None]
+        located = [i for i, p in enumerate(self.products) if p.bbox is not None]
+        self._geometries = [self.products[i].geometry for i in located]
+        self._positions = located
+        self._tree = STRtree(self._geometries) if self._geometries else None
+        self._geometry_positions = dict((id(g), i) for g, i in zip(self._geometries, located))
+
+    @classmethod
+    def from_catalog(cls, catalog, producttype, fileformat='HDF5', startdate=None, enddate=None,
+                     min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Builds an index from one broad catalog search."""
+
+        products = catalog.get_products(producttype, fileformat, startdate, enddate,
+                                        min_lon, max_lon, min_lat, max_lat)
+        return cls(products, (startdate, enddate, min_lon, max_lon, min_lat, max_lat))
+
+    def __len__(self):
+        return len(self.products)
+
+    def _check_coverage(self, startdate, enddate, min_lon, max_lon, min_lat, max_lat):
+        """Raises a ValueError when a search is not covered by the indexed search."""
+
+        if self.coverage is None:
+            return
+        start, end, cover_min_lon, cover_max_lon, cover_min_lat, cover_max_lat = self.coverage
+
+        def within(lower, upper, cover_lower, cover_upper):
+            return ((cover_lower is None or (lower is not None and lower >= cover_lower))
+                    and (cover_upper is None or (upper is not None and upper <= cover_upper)))
+
+        if not (within(startdate, enddate, _day(start), _day(end))
+                and within(min_lon, max_lon, cover_min_lon, cover_max_lon)
+                and within(min_lat, max_lat, cover_min_lat, cover_max_lat)):
+            raise ValueError("search is outside of the indexed region or date range")
+
+    def _time_range(self, startdate, enddate):
+        """Returns the positions of the products within an inclusive date range."""
+
+        if startdate is None and enddate is None:
+            return 0, len(self.products)
+        low = 0
+        high = len(self._times)
+        if startdate is not None:
+            low = bisect_left(self._times, dt.combine(startdate, dt.min.time()))
+        if enddate is not None:
+            high = bisect_left(self._times, dt.combine(enddate + timedelta(days=1),
+                                                       dt.min.time()))
+        return low, max(low, high)
+
+    def _spatial(self, min_lon, max_lon, min_lat, max_lat):
+        """Returns the positions of the products intersecting a region of interest."""
+
+        region = box(-180 if min_lon is None else min_lon, -90 if min_lat is None else min_lat,
+                     180 if max_lon is None else max_lon, 90 if max_lat is None else max_lat)
+        positions = list(self._unlocated)
+        if self._tree is None:
+            return positions
+        try:
+            found = self._tree.query(region, predicate='intersects')
+            positions.extend(self._positions[i] for i in found)
+        except TypeError:
+            # shapely < 2 returns the candidate geometries, without predicate support
+            positions.extend(self._geometry_positions[id(g)]
+                             for g in self._tree.query(region) if g.intersects(region))
+        return positions
+
+    def get_products(self, startdate=None, enddate=None,
+                     min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Returns the indexed EOProducts for a region of interest and date range,
+        sorted by timestamp."""
+
+        startdate = _day(startdate)
+        enddate = _day(enddate)
+        self._check_coverage(startdate, enddate, min_lon, max_lon, min_lat, max_lat)
+        low, high = self._time_range(startdate, enddate)
+        positions = sorted(i for i in self._spatial(min_lon, max_lon, min_lat, max_lat)
+                           if low <= i < high)
+        return [self.products[i] for i in positions]
+
+
+def _day(value):
+    """Converts a search date to a date, like the catalog does."""
+
+    if value is None:
+        return None
+    return _as_date(Catalog.convert_date(value))
+
+
+def _moment(value):
+    """Converts a datetime, date or date string to a naive UTC datetime, like product timestamps."""
+
+    return _naive_utc(_parse_bound(value))
+
+
+class TimeSeriesIndex(object):
+    """This class indexes products per tile, for time series lookups.
+
+    For every (producttype, tilex, tiley) tile the product timestamps are kept
+    as a sorted list, so the products nearest to, before or after a moment,
+    or within a time window, are found by bisection instead of a scan over
+    all products. Products without a timestamp are not indexed.
+
+    Query moments may be datetimes, dates or date strings; timezone aware
+    moments are converted to UTC.
+
+    :param products: The EOProducts to index, as a list or any iterable, such as
+        the generator returned by :meth:`catalogclient.catalog.Catalog.iter_products`.
+    """
+
+    def __init__(self, products=()):
+
+        series = {}
+        for product in products:
+            if product.timestamp is not None:
+                key = (product.producttype, product.tilex, product.tiley)
+                series.setdefault(key, []).append(product)
+        self._times = {}
+        self._products = {}
+        for key, tile_products in series.items():
+            tile_products.sort(key=lambda p: p.timestamp)
+            self._times[key] = [p.timestamp for p in tile_products]
+            self._products[key] = tile_products
+
+    @classmethod
+    def from_catalog(cls, catalog, producttype, fileformat='HDF5', startdate=None, enddate=None,
+                     min_lon=-180, max_lon=180, min_lat=-90, max_lat=90):
+        """Builds an index while the products of a catalog search are received."""
+
+        return cls(catalog.iter_products(producttype, fileformat, startdate, enddate,
+                                         min_lon, max_lon, min_lat, max_lat))
+
+    def __len__(self):
+        return sum(len(times) for times in self._times.values())
+
+    def tiles(self):
+        """
+        Returns the indexed tiles.
+        :return: A sorted list of (producttype, tilex, tiley) tuples
+        """
+        return sorted(self._times)
+
+    def times(self, producttype, tilex, tiley):
+        """Returns the sorted timestamps of the products of a tile."""
+
+        return list(self._times.get((producttype, tilex, tiley), ()))
+
+    def _series(self, producttype, tilex, tiley):
+        key = (producttype, tilex, tiley)
+        return self._times.get(key, []), self._products.get(key, [])
+
+    def before(self, producttype, tilex, tiley, moment, inclusive=True):
+        """
+        Returns the latest product of a tile at or before a moment.
+
+        :param inclusive: Whether a product at exactly that moment qualifies.
+        :return: An EOProduct, or None.
+        """
+        times, products = self._series(producttype, tilex, tiley)
+        bisect = bisect_right if inclusive else bisect_left
+        position = bisect(times, _moment(moment))
+        return products[position - 1] if position > 0 else None
+
+    def after(self, producttype, tilex, tiley, moment, inclusive=True):
+        """
+        Returns the earliest product of a tile at or after a moment.
+
+        :param inclusive: Whether a product at exactly that moment qualifies.
+        :return: An EOProduct, or None.
+        """
+        times, products = self._series(producttype, tilex, tiley)
+        bisect = bisect_left if inclusive else bisect_right
+        position = bisect(times, _moment(moment))
+        return products[position] if position < len(products) else None
+
+    def nearest(self, producttype, tilex, tiley, moment):
+        """
+        Returns the product of a tile closest in time to a moment; of two equally
+        close products, the earlier one.
+
+        :return: An EOProduct, or None.
+        """
+        times, products = self._series(producttype, tilex, tiley)
+        moment = _moment(moment)
+        position = bisect_left(times, moment)
+        if position == len(times):
+            return products[-1] if products else None
+        if position > 0 and moment - times[position - 1] <= times[position] - moment:
+            return products[position - 1]
+        return products[position]
+
+    def between(self, producttype, tilex, tiley, start=None, end=None):
+        """
+        Returns the products of a tile within an inclusive time window, in time order.
+
+        :param start: The start of the window, or None.
+        :param end: The end of the window, or None. A date, or a date string without
+            a time such as '2016-01-11', includes the whole day.
+        :return: A list of EOProducts.
+        """
+        times, products = self._series(producttype, tilex, tiley)
+        low = 0 if start is None else bisect_left(times, _moment(start))
+        if end is not None:
+            end = _parse_bound(end)
+        if end is None:
+            high = len(times)
+        elif isinstance(end, date) and not isinstance(end, dt):
+            high = bisect_left(times, _moment(end + timedelta(days=1)))
+        else:
+            high = bisect_right(times, _moment(end))
+        return products[low:high]
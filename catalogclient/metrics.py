@@ -0,0 +1,133 @@
+"""This module provides instrumentation for the catalog client: a record of
+ the cost of each catalog call, and an aggregator reporting percentiles."""
+
+import threading
+from collections import deque
+
+PHASES = ('request', 'transfer', 'decode', 'build')
+DEFAULT_SAMPLES = 10000
+
+
+class CallMetrics(object):
+    """This class records the cost of one catalog call.
+
+    The phases are in seconds: 'request' is the time until the response
+    headers arrived (connecting and waiting for the server), 'transfer' the
+    time reading the response body, 'decode' the JSON decoding and 'build'
+    the construction of the result objects. Phases that did not happen,
+    such as the transfer of a cached response, are 0.
+
+    The cache is 'hit', 'miss' or 'revalidated' with a response cache, or
+    'coalesced' for a call that waited for an identical call in flight; the
+    wait is then its 'request' phase.
+
+    :param method: The name of the Catalog method.
+    :param url: The requested url.
+    """
+
+    __slots__ = ('method', 'url', 'status', 'cache', 'request', 'transfer', 'decode', 'build',
+                 'response_bytes', 'items')
+
+    def __init__(self, method, url):
+
+        self.method = method
+        self.url = url
+        self.status = None
+        self.cache = None
+        self.request = 0.0
+        self.transfer = 0.0
+        self.decode = 0.0
+        self.build = 0.0
+        self.response_bytes = 0
+        self.items = 0
+
+    @property
+    def total(self):
+        """The total duration of the call, in seconds."""
+
+        return self.request + self.transfer + self.decode + self.build
+
+    def __str__(self):
+
+        return ("{0} {1} status={2} cache={3} request={4:.3f}s transfer={5:.3f}s "
+                "decode={6:.3f}s build={7:.3f}s bytes={8} items={9}").format(
+                    self.method, self.url, self.status, self.cache, self.request,
+                    self.transfer, self.decode, self.build, self.response_bytes, self.items)
+
+
+def _percentile(values, percentile):
+    """Returns a percentile of sorted values, interpolating between the nearest ranks."""
+
+    if not values:
+        return None
+    position = (len(values) - 1) * percentile / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class MetricsAggregator(object):
+    """This class collects CallMetrics and reports percentiles per Catalog method.
+
+    Pass it as the metrics callback of a Catalog. Only the most recent
+    samples of each method are kept for the percentiles; the counters cover
+    all calls.
+
+    :param samples: The number of recent calls kept per method.
+    :param percentiles: The percentiles reported by :meth:`summary`.
+    """
+
+    def __init__(self, samples=DEFAULT_SAMPLES, percentiles=(50, 90, 99)):
+
+        self.samples = samples
+        self.percentiles = percentiles
+        self._calls = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, call):
+
+        with self._lock:
+            calls = self._calls.get(call.method)
+            if calls is None:
+                calls = self._calls[call.method] = deque(maxlen=self.samples)
+                self._counters[call.method] = {'calls': 0, 'errors': 0, 'response_bytes': 0,
+                                               'items': 0, 'cache_hits': 0, 'coalesced': 0}
+            calls.append(call)
+            counters = self._counters[call.method]
+            counters['calls'] += 1
+            counters['response_bytes'] += call.response_bytes
+            counters['items'] += call.items
+            if call.status is not None and call.status >= 400:
+                counters['errors'] += 1
+            if call.cache == 'hit':
+                counters['cache_hits'] += 1
+            elif call.cache == 'coalesced':
+                counters['coalesced'] += 1
+
+    def summary(self):
+        """
+        Reports the counters and phase percentiles of each method.
+
+        :return: A dict mapping method names to a dict with the counters and,
+            for each phase and the total, a dict mapping percentiles to seconds.
+        """
+        with self._lock:
+            calls = dict((method, list(samples)) for method, samples in self._calls.items())
+            counters = dict((method, dict(c)) for method, c in self._counters.items())
+
+        summary = {}
+        for method, samples in calls.items():
+            report = counters[method]
+            for phase in PHASES + ('total',):
+                values = sorted(getattr(call, phase) for call in samples)
+                report[phase] = dict((p, _percentile(values, p)) for p in self.percentiles)
+            summary[method] = report
+        return summary
+
+    def reset(self):
+        """Forgets all collected calls."""
+
+        with self._lock:
+            self._calls.clear()
+            self._counters.clear()
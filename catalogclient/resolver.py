@@ -0,0 +1,160 @@
+"""This module resolves the file URIs of catalog search results to local paths
+ and checks in bulk which products are available on the local file system."""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from urllib.parse import unquote, urlparse
+except ImportError:
+    from urllib import unquote
+    from urlparse import urlparse
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+DEFAULT_RESOLVER_WORKERS = 8
+
+
+def local_path(filename):
+    """
+    Converts the filename of an EOProductFile to a local path.
+
+    :param filename: A 'file:' URI, such as 'file:/data/MTDA/...', or a plain path.
+    :return: The local path, or None for URIs of other schemes.
+    """
+    uri = urlparse(filename)
+    if uri.scheme == 'file':
+        return unquote(uri.path)
+    if uri.scheme:
+        return None
+    return filename
+
+
+class FileResolver(object):
+    """This class checks the availability of product files on a local or network file system.
+
+    Each product directory is listed once with scandir, and whether a file
+    exists is answered from the listing: the file type comes with the
+    directory entries on most file systems, so no stat call is made per file.
+    The listings are cached and made on a thread pool, which hides most of
+    the latency of a network file system such as NFS.
+
+    Checking file sizes does need a stat call per file; it is only done when
+    min_size is given, with the stat calls spread over the thread pool.
+
+    :param max_workers: The number of directories listed, or files checked, at the same time.
+    :param min_size: The smallest size, in bytes, of an available file, such as 1 to
+        treat empty files as missing. By default sizes are not checked.
+    """
+
+    def __init__(self, max_workers=DEFAULT_RESOLVER_WORKERS, min_size=None):
+
+        if scandir is None:
+            raise ImportError("FileResolver requires os.scandir or the scandir package")
+
+        self.max_workers = max_workers
+        self.min_size = min_size
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Forgets the cached directory listings, to see files created since."""
+
+        with self._lock:
+            self._listings = {}
+
+    def _listing(self, directory):
+        """Returns the cached {name: DirEntry} listing of a directory, empty if it is missing."""
+
+        listing = self._listings.get(directory)
+        if listing is None:
+            try:
+                listing = dict((entry.name, entry) for entry in scandir(directory))
+            except OSError:
+                listing = {}
+            with self._lock:
+                listing = self._listings.setdefault(directory, listing)
+        return listing
+
+    def _entries(self, executor, paths):
+        """Looks up the directory entries of local files, listing their directories in parallel."""
+
+        directories = set(os.path.dirname(path) or os.curdir for path in paths)
+        listings = dict(zip(directories, executor.map(self._listing, directories)))
+        entries = {}
+        for path in paths:
+            directory, name = os.path.split(path)
+            entry = listings[directory or os.curdir].get(name)
+            try:
+                entries[path] = entry if entry is not None and entry.is_file() else None
+            except OSError:
+                entries[path] = None
+        return entries
+
+    def exists(self, paths):
+        """
+        Tells which local files exist, from the listings of their directories.
+
+        :param paths: Local file paths.
+        :return: A dict mapping each path to True if it is an existing file, else False.
+        """
+        paths = set(paths)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            entries = self._entries(executor, paths)
+        return dict((path, entry is not None) for path, entry in entries.items())
+
+    def sizes(self, paths):
+        """
+        Looks up the sizes of local files, with the stat calls spread over the thread pool.
+
+        :param paths: Local file paths.
+        :return: A dict mapping each path to its size in bytes, or None if it does not exist.
+        """
+        def size(entry):
+            try:
+                return None if entry is None else entry.stat().st_size
+            except OSError:
+                return None
+
+        paths = set(paths)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            entries = self._entries(executor, paths)
+            return dict(zip(entries, executor.map(size, entries.values())))
+
+    def resolve(self, products):
+        """
+        Resolves the files of EOProducts to local paths and checks their availability.
+
+        :param products: EOProducts, such as the result of
+            :meth:`catalogclient.catalog.Catalog.get_products`.
+        :return: An (available, missing) tuple. Available is a list of (product, paths)
+            tuples, with the local paths of all files of the product. Missing is a list
+            of (product, filenames) tuples, with the filenames of the files that do not
+            exist locally, are smaller than min_size, or are not 'file:' URIs.
+        """
+        products = list(products)
+        paths = [[local_path(f.filename) for f in product.files or ()] for product in products]
+        local = [path for product_paths in paths for path in product_paths if path is not None]
+        if self.min_size is None:
+            present = self.exists(local)
+        else:
+            present = dict((path, size is not None and size >= self.min_size)
+                           for path, size in self.sizes(local).items())
+
+        available = []
+        missing = []
+        for product, product_paths in zip(products, paths):
+            missing_files = [f.filename for f, path in zip(product.files or (), product_paths)
+                             if path is None or not present[path]]
+            if missing_files:
+                missing.append((product, missing_files))
+            else:
+                available.append((product, product_paths))
+        return available, missing
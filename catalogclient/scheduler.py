@@ -0,0 +1,163 @@
+"""This module provides a request scheduler that keeps parallel catalog traffic
+ within the capacity of the server: an adaptive (AIMD) concurrency limit, a
+ token bucket rate limit and retries with jittered exponential backoff."""
+
+import random
+import threading
+import time
+
+import requests
+
+try:
+    from time import monotonic as _clock
+except ImportError:
+    _clock = time.time
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket(object):
+    """This class limits the rate of requests, allowing short bursts.
+
+    :param rate: The sustained number of requests per second.
+    :param burst: The number of requests that may be made at once after an idle period.
+    """
+
+    def __init__(self, rate, burst=1):
+
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._updated = _clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, waiting until one is available."""
+
+        while True:
+            with self._lock:
+                now = _clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimit(object):
+    """This class bounds the number of concurrent requests with an AIMD limit.
+
+    The limit grows by about one for each full window of successful requests,
+    and is multiplied by the decrease factor when the server signals overload.
+    Like TCP, it is decreased at most once per window: the requests that were
+    in flight when the limit was cut report the same overload, so further
+    overloads are ignored until as many requests as the limit before the cut
+    have finished.
+
+    :param initial: The initial concurrency limit.
+    :param minimum: The lowest concurrency limit.
+    :param maximum: The highest concurrency limit.
+    :param decrease_factor: The factor applied to the limit on overload.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, decrease_factor=0.5):
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.limit = float(max(minimum, min(maximum, initial)))
+        self.in_flight = 0
+        self._finished = 0
+        self._window = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Takes a concurrency slot, waiting until one is available."""
+
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, overloaded=False):
+        """Returns a concurrency slot and adapts the limit to the outcome of the request."""
+
+        with self._condition:
+            self.in_flight -= 1
+            self._finished += 1
+            if overloaded:
+                if self._finished >= self._window:
+                    self._window = int(self.limit)
+                    self._finished = 0
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class RequestScheduler(object):
+    """This class schedules catalog requests, and can be shared between threads and catalogs.
+
+    Responses with a retryable status and connection errors are retried with
+    full jitter exponential backoff, honouring a Retry-After header. They
+    also lower the concurrency limit, while successful responses raise it.
+
+    :param concurrency: The AdaptiveLimit bounding concurrent requests; a default one if None.
+    :param rate: An optional maximum number of requests per second.
+    :param burst: The number of requests allowed at once under the rate limit.
+    :param max_retries: The number of retries of a failing request.
+    :param backoff_base: The backoff before the first retry, in seconds.
+    :param backoff_max: The maximum backoff, in seconds.
+    :param retry_statuses: The HTTP status codes that are retried.
+    """
+
+    def __init__(self, concurrency=None, rate=None, burst=1, max_retries=5, backoff_base=0.5,
+                 backoff_max=30.0, retry_statuses=RETRY_STATUSES):
+
+        self.concurrency = AdaptiveLimit() if concurrency is None else concurrency
+        self.bucket = None if rate is None else TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = retry_statuses
+        self.retries = 0
+
+    def _backoff(self, attempt, response=None):
+        """Returns the time to wait before a retry."""
+
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None and retry_after.isdigit():
+                return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def execute(self, send):
+        """
+        Performs a request, retrying it when the server is overloaded.
+
+        :param send: A callable performing the request and returning a requests.Response.
+        :return: The response of the last attempt.
+        """
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            self.concurrency.acquire()
+            response = None
+            try:
+                response = send()
+            except (requests.ConnectionError, requests.Timeout):
+                self.concurrency.release(overloaded=True)
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                overloaded = response.status_code in self.retry_statuses
+                self.concurrency.release(overloaded=overloaded)
+                if not overloaded or attempt >= self.max_retries:
+                    return response
+                response.close()
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+            self.retries += 1
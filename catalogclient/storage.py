@@ -0,0 +1,153 @@
+"""This module saves catalog search results to disk and loads them back as a
+ ProductCollection. Arrow IPC files are memory-mapped and their numeric
+ columns used without copying; Parquet is supported for exchange with other
+ tools, and NDJSON when the optional pyarrow package is not installed."""
+
+import json
+
+import numpy as np
+
+from catalogclient.collection import ProductCollection
+
+FORMATS = {
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.parquet': 'parquet',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+_BAND_NAMES_KEY = b'catalogclient.band_names'
+
+
+def _format(path, fileformat):
+    """Picks the storage format from the argument, the file extension, or what is installed."""
+
+    if fileformat is not None:
+        return fileformat
+    for extension, name in FORMATS.items():
+        if str(path).endswith(extension):
+            return name
+    try:
+        import pyarrow # pylint: disable=W0611
+        return 'arrow'
+    except ImportError:
+        return 'ndjson'
+
+
+def _collection(products):
+    if isinstance(products, ProductCollection):
+        return products
+    return ProductCollection.from_products(products)
+
+
+def _to_table(collection):
+    """Converts a collection to a single-batch Arrow table."""
+
+    import pyarrow as pa
+
+    bands = pa.LargeListArray.from_arrays(pa.array(collection.band_offsets, pa.int64()),
+                                          pa.array(collection.band_codes, pa.int32()))
+    files = pa.LargeListArray.from_arrays(
+        pa.array(collection.file_offsets, pa.int64()),
+        pa.StructArray.from_arrays([pa.array(list(collection.filenames), pa.string()), bands],
+                                   ['filename', 'bands']))
+    geometries = [None if g is None else json.dumps(g if isinstance(g, dict) else g.__geo_interface__)
+                  for g in collection.geometries]
+    bbox = pa.FixedSizeListArray.from_arrays(
+        pa.array(np.ascontiguousarray(collection.bbox, dtype=np.float64).reshape(-1)), 4)
+    table = pa.table({
+        'producttype': pa.array(list(collection.producttype), pa.string()).dictionary_encode(),
+        'tilex': pa.array(collection.tilex, pa.int32()),
+        'tiley': pa.array(collection.tiley, pa.int32()),
+        'timestamp': pa.array(collection.timestamp.astype(np.int64), pa.int64()),
+        'bbox': bbox,
+        'geometry': pa.array(geometries, pa.string()),
+        'files': files,
+    })
+    return table.replace_schema_metadata(
+        {_BAND_NAMES_KEY: json.dumps(collection.band_names).encode('utf-8')})
+
+
+def _from_table(table):
+    """Builds a collection over the columns of an Arrow table, loading string columns lazily."""
+
+    def column(name):
+        data = table.column(name)
+        return data.chunk(0) if data.num_chunks == 1 else data.combine_chunks()
+
+    files = column('files')
+    bands = files.values.field('bands')
+    band_names = json.loads(table.schema.metadata[_BAND_NAMES_KEY].decode('utf-8'))
+
+    def geometries():
+        values = np.empty(table.num_rows, dtype=object)
+        values[:] = [None if g is None else json.loads(g) for g in column('geometry').to_pylist()]
+        return values
+
+    return ProductCollection(
+        lambda: column('producttype').dictionary_decode().to_numpy(zero_copy_only=False),
+        column('tilex').to_numpy(),
+        column('tiley').to_numpy(),
+        column('timestamp').to_numpy().view('datetime64[s]'),
+        column('bbox').values.to_numpy().reshape(-1, 4),
+        geometries,
+        files.offsets.to_numpy(),
+        lambda: files.values.field('filename').to_numpy(zero_copy_only=False),
+        bands.offsets.to_numpy(),
+        bands.values.to_numpy(),
+        band_names)
+
+
+def write_products(products, path, fileformat=None):
+    """
+    Saves catalog search results.
+
+    :param products: A ProductCollection or a list of EOProducts.
+    :param path: The file to write.
+    :param fileformat: 'arrow', 'parquet' or 'ndjson'; by default derived from the
+        file extension, or 'arrow' when pyarrow is installed.
+    """
+    fileformat = _format(path, fileformat)
+    if fileformat == 'ndjson':
+        with open(path, 'w') as output:
+            for product in products:
+                output.write(json.dumps(product.to_dict()))
+                output.write('\n')
+        return
+
+    table = _to_table(_collection(products))
+    if fileformat == 'arrow':
+        import pyarrow as pa
+        with pa.OSFile(str(path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=max(1, table.num_rows))
+    elif fileformat == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, str(path))
+    else:
+        raise ValueError("unsupported format: " + str(fileformat))
+
+
+def read_products(path, fileformat=None):
+    """
+    Loads catalog search results saved by :meth:`write_products`.
+
+    Arrow files are memory-mapped: the numeric columns are views on the file,
+    and the product types, filenames and geometries are only decoded when used.
+
+    :return: A ProductCollection.
+    """
+    fileformat = _format(path, fileformat)
+    if fileformat == 'ndjson':
+        with open(path) as source:
+            return ProductCollection.from_json(json.loads(line) for line in source if line.strip())
+    if fileformat == 'arrow':
+        import pyarrow as pa
+        table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    elif fileformat == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(str(path), memory_map=True)
+    else:
+        raise ValueError("unsupported format: " + str(fileformat))
+    return _from_table(table)
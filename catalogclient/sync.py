@@ -0,0 +1,203 @@
+"""This module keeps a local, persistent index of catalog products up to date,
+ fetching only the acquisitions that are not in the index yet."""
+
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime as dt, timedelta
+
+from catalogclient.catalog import (Catalog, TIMESTAMP_FORMAT, _naive_utc, _parse_bound,
+                                   _parse_timestamp)
+
+DEFAULT_SYNC_WORKERS = 4
+
+
+def _format_timestamp(timestamp):
+    return timestamp.strftime(TIMESTAMP_FORMAT)
+
+
+class ProductIndex(object):
+    """This class is a local index of catalog products, stored in a SQLite database.
+
+    Besides the products, it records which acquisition times have been
+    synchronised and a high-water mark per product type and file format.
+
+    :param path: The path of the database file, or ':memory:'.
+    """
+
+    def __init__(self, path):
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS products ('
+                'producttype TEXT, fileformat TEXT, timestamp TEXT, tilex INTEGER, tiley INTEGER, '
+                'product TEXT, PRIMARY KEY (producttype, fileformat, timestamp, tilex, tiley))')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS times ('
+                'producttype TEXT, fileformat TEXT, timestamp TEXT, '
+                'PRIMARY KEY (producttype, fileformat, timestamp))')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS high_water_marks ('
+                'producttype TEXT, fileformat TEXT, timestamp TEXT, '
+                'PRIMARY KEY (producttype, fileformat))')
+
+    def close(self):
+        """Closes the database connection."""
+
+        with self._lock:
+            self._connection.close()
+
+    def high_water_mark(self, producttype, fileformat):
+        """
+        Returns the latest acquisition time up to which the index is complete.
+        :return: A datetime object, or None if nothing was synchronised yet.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT timestamp FROM high_water_marks WHERE producttype = ? AND fileformat = ?',
+                (producttype, fileformat)).fetchone()
+        return None if row is None else _parse_timestamp(row[0])
+
+    def set_high_water_mark(self, producttype, fileformat, timestamp):
+        """Records the latest acquisition time up to which the index is complete."""
+
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO high_water_marks VALUES (?, ?, ?)',
+                                     (producttype, fileformat, _format_timestamp(timestamp)))
+
+    def times(self, producttype, fileformat):
+        """Returns the set of synchronised acquisition times."""
+
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT timestamp FROM times WHERE producttype = ? AND fileformat = ?',
+                (producttype, fileformat)).fetchall()
+        return set(_parse_timestamp(row[0]) for row in rows)
+
+    def add(self, producttype, fileformat, times, products):
+        """
+        Stores the products of some acquisition times, marking these times as synchronised.
+
+        :param times: The acquisition times covered by the products.
+        :param products: A list of EOProducts.
+        """
+        rows = []
+        for product in products:
+            dct = product.to_dict()
+            rows.append((producttype, fileformat, dct.get('timestamp'),
+                         product.tilex, product.tiley, json.dumps(dct)))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO times VALUES (?, ?, ?)',
+                [(producttype, fileformat, _format_timestamp(timestamp)) for timestamp in times])
+
+    def products(self, producttype, fileformat, startdate=None, enddate=None):
+        """
+        Returns the indexed products, optionally within an inclusive time range.
+
+        :param startdate: The start of the range, as a datetime, date or date string.
+        :param enddate: The end of the range, as a datetime, date or date string;
+            a date, or a date string without a time, includes the whole day.
+        :return: A list of EOProducts, sorted by timestamp.
+        """
+        query = 'SELECT product FROM products WHERE producttype = ? AND fileformat = ?'
+        args = [producttype, fileformat]
+        if startdate is not None:
+            query += ' AND timestamp >= ?'
+            args.append(_format_timestamp(_naive_utc(_parse_bound(startdate))))
+        if enddate is not None:
+            enddate = _parse_bound(enddate)
+            if isinstance(enddate, date) and not isinstance(enddate, dt):
+                query += ' AND timestamp < ?'
+                enddate += timedelta(days=1)
+            else:
+                query += ' AND timestamp <= ?'
+            args.append(_format_timestamp(_naive_utc(enddate)))
+        with self._lock:
+            rows = self._connection.execute(query + ' ORDER BY timestamp', args).fetchall()
+        return [Catalog._build_product(json.loads(row[0])) for row in rows] # pylint: disable=W0212
+
+
+class CatalogSync(object):
+    """This class synchronises a ProductIndex with the catalog.
+
+    The acquisition times listed by :meth:`Catalog.get_times` are compared with
+    the index, and the products of the missing times are fetched in parallel.
+    By default only times after the high-water mark of the index are
+    considered, so a sync costs in proportion to the new data.
+
+    :param catalog: The Catalog to fetch from.
+    :param index: The ProductIndex to update.
+    :param fileformat: The file format of the products.
+    :param max_workers: The number of dates fetched at the same time.
+    """
+
+    def __init__(self, catalog, index, fileformat='HDF5', min_lon=-180, max_lon=180,
+                 min_lat=-90, max_lat=90, max_workers=DEFAULT_SYNC_WORKERS):
+
+        self.catalog = catalog
+        self.index = index
+        self.fileformat = fileformat
+        self.bbox = (min_lon, max_lon, min_lat, max_lat)
+        self.max_workers = max_workers
+
+    def missing_times(self, producttype, full=False):
+        """
+        Returns the acquisition times available in the catalog but not in the index.
+
+        :param full: Compare all times with the index instead of only those
+            after the high-water mark, to pick up late additions to the catalog.
+        :return: A sorted list of datetime objects.
+        """
+        times = self.catalog.get_times(producttype)
+        if full:
+            known = self.index.times(producttype, self.fileformat)
+            return sorted(set(times) - known)
+        high_water_mark = self.index.high_water_mark(producttype, self.fileformat)
+        return sorted(set(t for t in times if high_water_mark is None or t > high_water_mark))
+
+    def sync(self, producttype, full=False):
+        """
+        Fetches the products of all missing acquisition times into the index.
+
+        The high-water mark advances up to the last time before the first
+        failed date; the first error is raised after all other dates are stored.
+
+        :param full: See :meth:`missing_times`.
+        :return: The number of products added.
+        """
+        missing = self.missing_times(producttype, full)
+        dates = {}
+        for timestamp in missing:
+            dates.setdefault(timestamp.date(), []).append(timestamp)
+
+        def fetch(day):
+            products = self.catalog.get_products(producttype, self.fileformat, day, day,
+                                                 *self.bbox)
+            self.index.add(producttype, self.fileformat, dates[day], products)
+            return len(products)
+
+        count = 0
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(day, executor.submit(fetch, day)) for day in sorted(dates)]
+        for day, future in futures:
+            error = future.exception()
+            if error is not None:
+                errors.append((day, error))
+            else:
+                count += future.result()
+
+        synced = [t for t in missing if not errors or t.date() < errors[0][0]]
+        high_water_mark = self.index.high_water_mark(producttype, self.fileformat)
+        if synced and (high_water_mark is None or synced[-1] > high_water_mark):
+            self.index.set_high_water_mark(producttype, self.fileformat, synced[-1])
+        if errors:
+            raise errors[0][1]
+        return count
@@ -2,7 +2,7 @@ import re
 
 from setuptools import setup
 
-test_requirements = ['pytest','requests','mock']
+test_requirements = ['pytest','requests','mock','aiohttp>=3.3; python_version >= "3.5.3"']
 
 with open('catalogclient/__init__.py', 'r') as fd:
     version = re.search(r'^__version__\s*=\s*[\'"]([^\'"]*)[\'"]',
@@ -18,4 +18,16 @@ setup(name='catalogclient',
       test_suite = 'tests',
       tests_require=test_requirements,
       setup_requires=['pytest-runner'],
-      install_requires=['requests','shapely>=1.5.17','python-dateutil'])
+      install_requires=['requests','shapely>=1.5.17','python-dateutil',
+                        'futures; python_version < "3"',
+                        'scandir; python_version < "3.5"'],
+      extras_require={
+          'async': ['aiohttp>=3.3'],
+          'streaming': ['ijson>=3.1'],
+          'collection': ['numpy', 'pandas'],
+          'storage': ['numpy', 'pyarrow'],
+          'fastjson': ['orjson']
+      },
+      entry_points={
+          'console_scripts': ['catalogclient = catalogclient.cli:main']
+      })
@@ -0,0 +1,8 @@
+"""This module configures the collection of the unit tests"""
+
+import sys
+
+collect_ignore = []
+if sys.version_info < (3, 5):
+    # the asyncio client and its tests use async/await syntax
+    collect_ignore.append('test_asynccatalog.py')
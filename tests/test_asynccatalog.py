@@ -0,0 +1,104 @@
+"""This module provides unit tests for the asyncio PROBA-V MEP Python catalog client"""
+
+import asyncio
+import datetime
+import json
+from unittest import TestCase, skipIf
+
+try:
+    from aiohttp import web, ClientResponseError
+    from catalogclient import asynccatalog
+except ImportError:
+    asynccatalog = None
+
+
+def _load(name):
+    with open('testresources/' + name, 'r') as json_input:
+        return json.loads(json_input.read())
+
+
+@skipIf(asynccatalog is None, "aiohttp is not installed")
+class TestAsyncCatalog(TestCase):
+    """This class provides unit tests for the asyncio PROBA-V MEP Python catalog client"""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.requests = []
+
+    def tearDown(self):
+        self.loop.close()
+
+    def _run(self, coroutine_function):
+        """Serves the test resources locally and runs a coroutine against them."""
+
+        async def handler(request):
+            self.requests.append(request.rel_url)
+            name = request.match_info['name']
+            if name == 'ERROR':
+                return web.Response(status=500)
+            if request.path.endswith('/times'):
+                return web.json_response(_load('times.json'))
+            return web.json_response(_load('probav_geotiff.json'))
+
+        async def producttypes(request):
+            return web.json_response(_load('producttypes.json'))
+
+        async def main():
+            app = web.Application()
+            app.router.add_get('/', producttypes)
+            app.router.add_get('/{name}', handler)
+            app.router.add_get('/{name}/times', handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1] # pylint: disable=W0212
+            try:
+                async with asynccatalog.AsyncCatalog('http://127.0.0.1:%d/' % port) as cat:
+                    return await coroutine_function(cat)
+            finally:
+                await runner.cleanup()
+
+        return self.loop.run_until_complete(main())
+
+    def test_get_producttypes(self):
+        """Unit test for retrieval of producttypes."""
+
+        producttypes = self._run(lambda cat: cat.get_producttypes())
+        self.assertEqual(len(producttypes), 49)
+
+    def test_get_products(self):
+        """Unit test for retrieval of products by date range."""
+
+        products = self._run(lambda cat: cat.get_products(
+            'PROBAV_L3_S10_TOC_333M', fileformat='GEOTIFF',
+            startdate=datetime.date(2016, 1, 1), enddate=datetime.date(2016, 1, 2)))
+        self.assertEqual(len(products), 2)
+        self.assertEqual(products[0].geometry.geom_type, 'Polygon')
+        self.assertEqual(self.requests[0].query['startDate'], '20160101')
+        self.assertEqual(self.requests[0].query['format'], 'GEOTIFF')
+
+    def test_get_times(self):
+        """Unit test for retrieval of times for a producttype."""
+
+        times = self._run(lambda cat: cat.get_times('PROBAV_L3_S10_TOC_333M'))
+        self.assertEqual(len(times), 116)
+
+    def test_gather_products(self):
+        """Unit test for concurrent retrieval of several queries."""
+
+        queries = [{'producttype': 'PROBAV_L3_S10_TOC_333M', 'year': 2016},
+                   {'producttype': 'PROBAV_L3_S1_TOC_333M', 'min_lon': 0, 'max_lon': 10},
+                   {'producttype': 'ERROR'}]
+        results = self._run(lambda cat: cat.gather_products(queries, concurrency=2,
+                                                            return_exceptions=True))
+        self.assertEqual(len(results[0]), 2)
+        self.assertEqual(len(results[1]), 2)
+        self.assertIsInstance(results[2], ClientResponseError)
+        self.assertEqual(len(self.requests), 3)
+
+    def test_get_products_error(self):
+        """Unit test to test error handling behaviour for retrieval of products."""
+
+        with self.assertRaises(ClientResponseError):
+            self._run(lambda cat: cat.get_products('ERROR'))
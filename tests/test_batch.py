@@ -0,0 +1,84 @@
+"""This module provides unit tests for batch catalog searches"""
+
+import datetime
+from unittest import TestCase
+
+from mock import mock
+from shapely.geometry import Point, box
+from catalogclient import batch, catalog
+from tests.test_index import _product
+
+
+class TestBatch(TestCase):
+    """This class provides unit tests for batch catalog searches"""
+
+    def test_merge_regions(self):
+        """Tests clustering of nearby boxes."""
+
+        bounds = [(0, 0, 1, 1), (20, 20, 21, 21), (1.2, 0, 2, 1), (2.4, 0.5, 3, 3)]
+        clusters = batch.merge_regions(bounds, merge_distance=0.5)
+        self.assertEqual(sorted(clusters), [((0, 0, 3, 3), [0, 2, 3]),
+                                            ((20, 20, 21, 21), [1])])
+        self.assertEqual(len(batch.merge_regions(bounds, merge_distance=0.1)), 4)
+
+    @mock.patch('catalogclient.catalog.Catalog.get_products')
+    def test_get_products_for_geometries(self, mock_get_products):
+        """Tests that products are searched per cluster and assigned per geometry."""
+
+        tiles = [_product(1, x, y) for x in range(3) for y in range(2)]
+        tiles.append(catalog.EOProduct('PROBAV_L3_S10_TOC_333M', 9, 9, [], None, None))
+        mock_get_products.return_value = tiles
+
+        geometries = [Point(5, 60).buffer(1),          # tile 0/0
+                      Point(10.5, 60).buffer(1),       # tiles 0/0 and 1/0
+                      box(25, 46, 26, 47),             # tile 2/1, far away
+                      Point(11.5, 50).buffer(0.2)]     # tile 1/1, close to the second one
+        products = batch.get_products_for_geometries(catalog.Catalog(), geometries,
+                                                     'PROBAV_L3_S10_TOC_333M', 'GEOTIFF',
+                                                     merge_distance=9)
+        self.assertEqual([[(p.tilex, p.tiley) for p in found] for found in products],
+                         [[(0, 0), (9, 9)], [(0, 0), (1, 0), (9, 9)], [(2, 1), (9, 9)],
+                          [(1, 1), (9, 9)]])
+        regions = sorted(call[0][4:] for call in mock_get_products.call_args_list)
+        self.assertEqual(len(regions), 2)
+        self.assertEqual(regions[0], (4.0, 11.7, 49.8, 61.0))
+
+    def test_plan_requests(self):
+        """Tests de-duplication of batch searches."""
+
+        plan = batch.plan_requests(['BioPar_TOCR_Tiles', 'BioPar_DMP_Tiles', 'BioPar_TOCR_Tiles'],
+                                   [2016, '2016', ('2016-01-01', '2016-12-31'),
+                                    (datetime.date(2017, 1, 1), '2017-03-31')])
+        self.assertEqual(plan, [('BioPar_TOCR_Tiles', 2016),
+                                ('BioPar_TOCR_Tiles', (datetime.date(2017, 1, 1),
+                                                       datetime.date(2017, 3, 31))),
+                                ('BioPar_DMP_Tiles', 2016),
+                                ('BioPar_DMP_Tiles', (datetime.date(2017, 1, 1),
+                                                      datetime.date(2017, 3, 31)))])
+
+    @mock.patch('catalogclient.catalog.Catalog.get_products', return_value=['range'])
+    @mock.patch('catalogclient.catalog.Catalog.get_products_for_year', return_value=['year'])
+    def test_get_products_batch(self, mock_for_year, mock_get_products):
+        """Tests concurrent retrieval of several product types and periods."""
+
+        results = batch.get_products_batch(
+            catalog.Catalog(), ['BioPar_TOCR_Tiles', 'PROBAV_L3_S1_TOC_1KM', 'BioPar_TOCR_Tiles'],
+            [2015, ('2016-01-01', '2016-01-31')],
+            fileformat={'BioPar_TOCR_Tiles': 'NETCDF', 'PROBAV_L3_S1_TOC_1KM': 'GEOTIFF'})
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[('PROBAV_L3_S1_TOC_1KM', 2015)], ['year'])
+        self.assertEqual(results[('BioPar_TOCR_Tiles', (datetime.date(2016, 1, 1),
+                                                        datetime.date(2016, 1, 31)))], ['range'])
+        self.assertEqual(mock_for_year.call_count, 2)
+        self.assertEqual(sorted(call[0][2] for call in mock_for_year.call_args_list),
+                         ['GEOTIFF', 'NETCDF'])
+
+    @mock.patch('catalogclient.catalog.Catalog.get_products_for_year',
+                side_effect=[ValueError(), ['year']])
+    def test_get_products_batch_errors(self, mock_for_year):
+        """Tests error handling of batch retrieval."""
+
+        results = batch.get_products_batch(catalog.Catalog(), ['A', 'B'], [2015],
+                                           max_workers=1, return_exceptions=True)
+        self.assertIsInstance(results[('A', 2015)], ValueError)
+        self.assertEqual(results[('B', 2015)], ['year'])
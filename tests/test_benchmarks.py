@@ -0,0 +1,63 @@
+"""This module provides smoke tests for the benchmark suite"""
+
+from unittest import TestCase, skipIf
+
+from mock import mock
+
+try:
+    from benchmarks import run, synthetic
+    from benchmarks.server import CatalogServer
+except ImportError:
+    run = None
+from catalogclient import catalog
+
+
+class OldCatalog(object):
+    """This class offers only the Catalog methods of the first releases"""
+
+    _build_products = staticmethod(catalog.Catalog._build_products) # pylint: disable=W0212
+
+    def __init__(self, baseurl):
+        self._catalog = catalog.Catalog(baseurl)
+        self.get_producttypes = self._catalog.get_producttypes
+        self.get_times = self._catalog.get_times
+        self.get_products = self._catalog.get_products
+        self.get_products_for_year = self._catalog.get_products_for_year
+
+
+@skipIf(run is None, "the benchmarks require Python 3")
+class TestBenchmarks(TestCase):
+    """This class provides smoke tests for the benchmark suite"""
+
+    def test_synthetic(self):
+        """Tests the size and structure of the synthetic responses."""
+
+        products = catalog.Catalog._build_products(synthetic.products(600)) # pylint: disable=W0212
+        self.assertEqual(len(products), 600)
+        self.assertEqual(len(products[0].bands()), 13)
+        self.assertEqual(len(synthetic.times(7)), 7)
+
+    def test_server(self):
+        """Tests that the stand-in catalog serves what the client expects."""
+
+        server = CatalogServer(products=10, times=5).start()
+        try:
+            with catalog.Catalog(server.url) as cat:
+                self.assertEqual(cat.get_producttypes(), [synthetic.PRODUCTTYPE])
+                self.assertEqual(len(cat.get_times(synthetic.PRODUCTTYPE)), 5)
+                self.assertEqual(len(cat.get_products(synthetic.PRODUCTTYPE)), 10)
+            self.assertEqual(server.requests, 3)
+        finally:
+            server.stop()
+
+    def test_run(self):
+        """Tests a run of all benchmarks, and one against an older Catalog."""
+
+        results = run.run(products=20, times=5, repeat=1)
+        self.assertEqual([r['name'] for r in results['results']],
+                         ['get_producttypes', 'get_times', 'get_products',
+                          'get_products_for_year', 'iter_products', '_build_products',
+                          '_build_products+access'])
+        with mock.patch('benchmarks.run.catalog', mock.Mock(Catalog=OldCatalog)):
+            results = run.run(products=20, times=5, repeat=1)
+        self.assertNotIn('iter_products', [r['name'] for r in results['results']])
@@ -0,0 +1,124 @@
+"""This module provides unit tests for the catalog response caches"""
+
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import mock
+from catalogclient import cache, catalog
+
+
+class CachedResponse(object):
+    """This class represents a mocked requests.Response object with a body and headers"""
+
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        return cache.CacheEntry(self.content).json()
+
+
+def times_response(*args, **kwargs):
+    with open('testresources/times.json', 'rb') as json_input:
+        return CachedResponse(200, json_input.read(), {'ETag': '"v1"'})
+
+
+class TestCache(TestCase):
+    """This class provides unit tests for the catalog response caches"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cache_key(self):
+        """Tests that cache keys do not depend on parameter order."""
+
+        self.assertEqual(cache.cache_key('http://x/a', {'b': 1, 'a': '2'}),
+                         cache.cache_key('http://x/a', {'a': 2, 'b': '1'}))
+        self.assertEqual(cache.cache_key('http://x/a'), 'http://x/a')
+
+    def test_memory_cache_eviction(self):
+        """Tests size based LRU eviction of the memory cache."""
+
+        memory = cache.MemoryCache(max_bytes=10)
+        memory.put('a', cache.CacheEntry(b'1234'))
+        memory.put('b', cache.CacheEntry(b'1234'))
+        memory.get('a')
+        memory.put('c', cache.CacheEntry(b'1234'))
+        self.assertIsNone(memory.get('b'))
+        self.assertEqual(memory.get('a').content, b'1234')
+        self.assertEqual(memory.size, 8)
+        memory.put('d', cache.CacheEntry(b'12345678901'))
+        self.assertIsNone(memory.get('d'))
+
+    def test_sqlite_cache(self):
+        """Tests persistence and eviction of the SQLite cache."""
+
+        path = os.path.join(self.directory, 'cache.db')
+        disk = cache.SQLiteCache(path, max_bytes=10)
+        disk.put('a', cache.CacheEntry(b'1234', etag='"e"', stored_at=5.0))
+        disk.put('b', cache.CacheEntry(b'1234'))
+        disk.get('a')
+        disk.put('c', cache.CacheEntry(b'1234'))
+        disk.close()
+
+        disk = cache.SQLiteCache(path, max_bytes=10)
+        self.assertIsNone(disk.get('b'))
+        entry = disk.get('a')
+        self.assertEqual((entry.content, entry.etag, entry.stored_at), (b'1234', '"e"', 5.0))
+        self.assertEqual(len(disk), 2)
+        self.assertEqual(disk.size, 8)
+        disk.close()
+
+    def test_response_cache_ttl(self):
+        """Tests freshness of cached responses per endpoint."""
+
+        disk = cache.SQLiteCache(os.path.join(self.directory, 'cache.db'))
+        responses = cache.ResponseCache(disk=disk, ttl={'times': 60})
+        responses.put('old', cache.CacheEntry(b'[]', stored_at=0))
+        self.assertEqual(responses.get('times', 'missing'), (None, False))
+        self.assertFalse(responses.get('times', 'old')[1])
+        self.assertTrue(responses.get('products_historical', 'old')[1])
+
+        responses.memory.clear()
+        entry, fresh = responses.get('products_historical', 'old')
+        self.assertTrue(fresh)
+        self.assertIs(responses.memory.get('old'), entry)
+        self.assertEqual(responses.stats, {'hits': 2, 'misses': 1, 'revalidations': 1})
+        disk.close()
+
+    @mock.patch('requests.Session.get', side_effect=times_response)
+    def test_catalog_cache_hit(self, mock_get):
+        """Tests that repeated catalog requests are answered from the cache."""
+
+        cat = catalog.Catalog(cache=cache.ResponseCache())
+        first = cat.get_times('PROBAV_L3_S10_TOC_333M')
+        second = cat.get_times('PROBAV_L3_S10_TOC_333M')
+        self.assertEqual(first, second)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(cat.cache.stats['hits'], 1)
+
+    @mock.patch('requests.Session.get', side_effect=times_response)
+    def test_catalog_cache_revalidation(self, mock_get):
+        """Tests that stale responses are revalidated with their ETag."""
+
+        cat = catalog.Catalog(cache=cache.ResponseCache(ttl={'times': 0}))
+        times = cat.get_times('PROBAV_L3_S10_TOC_333M')
+        mock_get.side_effect = lambda *args, **kwargs: CachedResponse(304)
+        self.assertEqual(cat.get_times('PROBAV_L3_S10_TOC_333M'), times)
+        self.assertEqual(mock_get.call_args[1]['headers']['If-None-Match'], '"v1"')
+        self.assertEqual(cat.cache.stats['revalidations'], 1)
+
+    def test_historical_products(self):
+        """Tests classification of product searches that no longer change."""
+
+        self.assertTrue(catalog._is_historical(datetime.date(2016, 1, 2))) # pylint: disable=W0212
+        self.assertTrue(catalog._is_historical('2016-01-02')) # pylint: disable=W0212
+        self.assertFalse(catalog._is_historical(datetime.date.today())) # pylint: disable=W0212
+        self.assertFalse(catalog._is_historical(None)) # pylint: disable=W0212
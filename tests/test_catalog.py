@@ -1,7 +1,13 @@
 """This module provides unit tests for the internal PROBA-V MEP Python catalog client"""
 
 import datetime
+import io
 import json
+import pickle
+import subprocess
+import sys
+import threading
+import time
 from unittest import TestCase
 from requests.exceptions import HTTPError
 from mock import mock
@@ -13,6 +19,11 @@ def probav_geotiff_response(*args, **kwargs):
         dct = json.loads(json_input.read())
         return MockedResponse(200, dct)
 
+def probav_geotiff_stream_response(*args, **kwargs):
+    with open('testresources/probav_geotiff.json', 'rb') as json_input:
+        content = json_input.read()
+        return MockedResponse(200, json.loads(content.decode('utf-8')), io.BytesIO(content))
+
 def producttypes_response(*args, **kwargs):
     with open('testresources/producttypes.json', 'r') as json_input:
         dct = json.loads(json_input.read())
@@ -30,13 +41,18 @@ def error_response(*args, **kwargs):
 class MockedResponse(object):
     """This class represents a mocked requests.Response object"""
 
-    def __init__(self, status_code, json_data):
+    def __init__(self, status_code, json_data, raw=None):
         self.json_data = json_data
+        self.content = json.dumps(json_data).encode('utf-8')
         self.status_code = status_code
+        self.raw = raw
 
     def json(self):
         return self.json_data
 
+    def close(self):
+        pass
+
     def raise_for_status(self):
         raise HTTPError()
 
@@ -91,6 +107,147 @@ class TestCatalog(TestCase):
 
 
 
+    def test_session_pooling(self):
+        """Tests that the catalog reuses one pooled session and releases it on close."""
+
+        with catalog.Catalog(pool_size=4, keep_alive=False) as cat:
+            session = cat.session
+            self.assertIs(cat.session, session)
+            adapter = session.get_adapter(catalog.CATALOG_BASE_URL)
+            self.assertEqual(adapter._pool_maxsize, 4) # pylint: disable=W0212
+            self.assertEqual(session.headers['Connection'], 'close')
+        self.assertIsNone(cat._session) # pylint: disable=W0212
+
+    def test_external_session_not_closed(self):
+        """Tests that a session passed in by the caller is left open."""
+
+        session = mock.MagicMock()
+        with catalog.Catalog(session=session) as cat:
+            self.assertIs(cat.session, session)
+        session.close.assert_not_called()
+
+    @mock.patch('requests.Session.get', side_effect=times_response)
+    def test_pickle_catalog(self, mock_get):
+        """Tests that a catalog in use can be pickled, keeping only its configuration."""
+
+        cat = catalog.Catalog('dummy.be/', pool_size=4, timeout=5, decoder='json')
+        cat.get_times('PROBAV_L3_S10_TOC_333M')
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(cat, protocol))
+            self.assertEqual((copy.baseurl, copy.pool_size, copy.timeout), ('dummy.be/', 4, 5))
+            self.assertIsNone(copy._session) # pylint: disable=W0212
+            self.assertIsNot(copy.session, cat.session)
+            self.assertEqual(len(copy.get_times('PROBAV_L3_S10_TOC_333M')), 116)
+            copy.close()
+
+    @mock.patch('requests.Session.get', side_effect=times_response)
+    def test_timeout_passed(self, mock_get):
+        """Tests that the configured timeout is applied to each request."""
+
+        cat = catalog.Catalog(timeout=5)
+        cat.get_times('PROBAV_L3_S10_TOC_333M')
+        self.assertEqual(mock_get.call_args[1]['timeout'], 5)
+
+    def test_lazy_geometry_and_timestamp(self): # pylint: disable=W0212
+        """Tests that geometry and timestamp are only built when accessed."""
+
+        with open('testresources/probav_geotiff.json', 'r') as json_input:
+            products = catalog.Catalog._build_products(json.loads(json_input.read()))
+        self.assertIsInstance(products[0]._geometry, dict)
+        self.assertEqual(products[0].bbox, (0.0, 55.0, 10.0, 65.0))
+        self.assertIsInstance(products[0]._geometry, dict)
+        self.assertEqual(products[0].geometry.bounds, (0.0, 55.0, 10.0, 65.0))
+        self.assertIsNone(products[1].bbox)
+        self.assertEqual(products[0].timestamp, datetime.datetime(2016, 1, 1))
+
+    def test_compact_products(self): # pylint: disable=W0212
+        """Tests that products share band layouts and file directories."""
+
+        with open('testresources/probav_geotiff.json', 'r') as json_input:
+            dct = json.loads(json_input.read())
+            products = catalog.Catalog._build_products(dct)
+            copies = catalog.Catalog._build_products(dct)
+        self.assertFalse(hasattr(products[0], '__dict__'))
+        self.assertFalse(hasattr(products[0].files[0], '__dict__'))
+        self.assertIs(products[0].files[1].bands, products[1].files[0].bands)
+        self.assertIs(products[0].files[0]._directory, products[0].files[1]._directory)
+        self.assertIs(products[0]._band_layout(), copies[0]._band_layout())
+        self.assertTrue(products[0].file('PROBAV:RED/TOC').endswith('X00Y00_20160101_333M_V001_RADIOMETRY.tif'))
+
+        products[0].files = [catalog.EOProductFile('file:/data/x.tif', ['PROBAV:RED/TOC'])]
+        self.assertEqual(products[0].file('PROBAV:RED/TOC'), 'file:/data/x.tif')
+        self.assertEqual(products[0].bands(), ['PROBAV:RED/TOC'])
+
+        products[0].files.append(catalog.EOProductFile('file:/data/y.tif', ['PROBAV:NDVI']))
+        self.assertEqual(products[0].file('PROBAV:NDVI'), 'file:/data/y.tif')
+        products[0].files[0] = catalog.EOProductFile('file:/data/z.tif', ['PROBAV:SM'])
+        self.assertEqual(products[0].bands(), ['PROBAV:SM', 'PROBAV:NDVI'])
+
+    def test_parse_timestamp(self):
+        """Tests that the fast timestamp parser matches strptime."""
+
+        with open('testresources/times.json', 'r') as json_input:
+            for value in json.loads(json_input.read()):
+                self.assertEqual(catalog._parse_timestamp(value), # pylint: disable=W0212
+                                 datetime.datetime.strptime(value, catalog.TIMESTAMP_FORMAT))
+        for value in ('2016-02-30T00:00:00Z', '2016-01-01 00:00:00', '2016-01-01T+1:00:00Z'):
+            with self.assertRaises(ValueError):
+                catalog._parse_timestamp(value) # pylint: disable=W0212
+
+        with mock.patch('catalogclient.catalog._fromisoformat', None):
+            self.assertEqual(catalog._parse_timestamp('2016-12-21T10:20:30Z'), # pylint: disable=W0212
+                             datetime.datetime(2016, 12, 21, 10, 20, 30))
+            with self.assertRaises(ValueError):
+                catalog._parse_timestamp('2016-01-01T+1:00:00Z') # pylint: disable=W0212
+
+    def test_to_dict(self): # pylint: disable=W0212
+        """Tests converting products back to the catalog JSON structure."""
+
+        with open('testresources/probav_geotiff.json', 'r') as json_input:
+            dct = json.loads(json_input.read())
+        products = catalog.Catalog._build_products(dct)
+        self.assertEqual([p.to_dict() for p in products], dct)
+        products[0].geometry # pylint: disable=W0104
+        products[0].timestamp # pylint: disable=W0104
+        copy = catalog.Catalog._build_product(json.loads(json.dumps(products[0].to_dict())))
+        self.assertEqual(copy.bbox, products[0].bbox)
+        self.assertEqual(copy.timestamp, products[0].timestamp)
+
+    def test_pickle(self): # pylint: disable=W0212
+        """Tests pickling products with every protocol."""
+
+        with open('testresources/probav_geotiff.json', 'r') as json_input:
+            dct = json.loads(json_input.read())
+        products = catalog.Catalog._build_products(dct)
+        products[0].geometry # pylint: disable=W0104
+        products[0].timestamp # pylint: disable=W0104
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            copies = pickle.loads(pickle.dumps(products, protocol))
+            self.assertEqual([p.to_dict() for p in copies], [p.to_dict() for p in products])
+            self.assertEqual(copies[0].bbox, products[0].bbox)
+            self.assertEqual(copies[1].bands(), products[1].bands())
+            self.assertIs(copies[1].files[0].bands, products[1].files[0].bands)
+
+    def test_geojson_bounds(self):
+        """Tests bounds computation of nested GeoJSON geometries."""
+
+        multipolygon = {'type': 'MultiPolygon',
+                        'coordinates': [[[[0, 0], [1, 0], [1, 1], [0, 0]]],
+                                        [[[5, -2], [6, -2], [6, 3], [5, -2]]]]}
+        self.assertEqual(catalog._geojson_bounds(multipolygon), (0, -2, 6, 3)) # pylint: disable=W0212
+        collection = {'type': 'GeometryCollection',
+                      'geometries': [{'type': 'Point', 'coordinates': [-1, 4]}, multipolygon]}
+        self.assertEqual(catalog._geojson_bounds(collection), (-1, -2, 6, 4)) # pylint: disable=W0212
+
+    def test_import_is_light(self):
+        """Tests that importing the catalog does not load its heavy dependencies."""
+
+        code = ("import sys, catalogclient.catalog; "
+                "print(' '.join(m for m in ('requests', 'shapely', 'dateutil', 'numpy', "
+                "'concurrent.futures', 'sqlite3', 'ijson') if m in sys.modules))")
+        loaded = subprocess.check_output([sys.executable, '-c', code]).decode().strip()
+        self.assertEqual(loaded, '')
+
     def test_get_product_parameters(self):
         """Tests parameter checks for the get_product method."""
 
@@ -100,7 +257,7 @@ class TestCatalog(TestCase):
         with self.assertRaises(ValueError):
             cat.get_products('PROBAV_L3_S10_TOC_333M', fileformat=None)
 
-    @mock.patch('requests.get', side_effect=producttypes_response)
+    @mock.patch('requests.Session.get', side_effect=producttypes_response)
     def test_get_producttypes(self, mock_get):
         """Unit test for retrieval of producttypes."""
 
@@ -108,7 +265,7 @@ class TestCatalog(TestCase):
         producttypes = cat.get_producttypes()
         self.assertEquals(len(producttypes), 49)
 
-    @mock.patch('requests.get', side_effect=probav_geotiff_response)
+    @mock.patch('requests.Session.get', side_effect=probav_geotiff_response)
     def test_get_products_by_daterange(self, mock_get):
         """Unit test for retrieval of products by date range."""
 
@@ -127,7 +284,65 @@ class TestCatalog(TestCase):
 
         self.assertIsNone(products[1].geometry)
 
-    @mock.patch('requests.get', side_effect=times_response)
+    @mock.patch('requests.Session.get', side_effect=probav_geotiff_stream_response)
+    def test_iter_products(self, mock_get):
+        """Unit test for streaming retrieval of products."""
+
+        cat = catalog.Catalog()
+        products = cat.iter_products('PROBAV_L3_S10_TOC_333M', fileformat='GEOTIFF')
+        first = next(products)
+        self.assertEqual(first.tilex, 0)
+        self.assertEqual(first.geometry.exterior.coords[1], (0.0, 55.0))
+        self.assertEqual(len(list(products)), 1)
+        self.assertTrue(mock_get.call_args[1]['stream'])
+
+    @mock.patch.dict('sys.modules', {'ijson': None})
+    @mock.patch('requests.Session.get', side_effect=probav_geotiff_stream_response)
+    def test_iter_products_without_ijson(self, mock_get):
+        """Unit test for retrieval of products when ijson is not installed."""
+
+        cat = catalog.Catalog()
+        products = list(cat.iter_products('PROBAV_L3_S10_TOC_333M', fileformat='GEOTIFF'))
+        self.assertEqual([p.tiley for p in products], [0, 1])
+
+    @mock.patch('requests.Session.get', side_effect=error_response)
+    def test_iter_products_error(self, mock_get):
+        """Unit test to test error handling behaviour for streaming retrieval of products."""
+
+        with self.assertRaises(HTTPError):
+            cat = catalog.Catalog()
+            next(cat.iter_products('PROBAV_L3_S10_TOC_333M'))
+
+    def test_date_windows(self):
+        """Tests splitting of a date range in search windows."""
+
+        windows = catalog._date_windows(datetime.date(2015, 11, 15), datetime.date(2016, 2, 10), 'month') # pylint: disable=W0212
+        self.assertEqual(windows, [(datetime.date(2015, 11, 15), datetime.date(2015, 11, 30)),
+                                   (datetime.date(2015, 12, 1), datetime.date(2015, 12, 31)),
+                                   (datetime.date(2016, 1, 1), datetime.date(2016, 1, 31)),
+                                   (datetime.date(2016, 2, 1), datetime.date(2016, 2, 10))])
+        windows = catalog._date_windows(datetime.date(2016, 1, 1), datetime.date(2016, 1, 25), 10) # pylint: disable=W0212
+        self.assertEqual(windows[-1], (datetime.date(2016, 1, 21), datetime.date(2016, 1, 25)))
+        with self.assertRaises(ValueError):
+            catalog._date_windows(datetime.date(2016, 1, 1), datetime.date(2016, 1, 25), 'week') # pylint: disable=W0212
+
+    @mock.patch('requests.Session.get', side_effect=probav_geotiff_response)
+    def test_get_products_sharded(self, mock_get):
+        """Unit test for retrieval of products by date range in parallel windows."""
+
+        cat = catalog.Catalog()
+        products = cat.get_products_sharded('PROBAV_L3_S10_TOC_333M', 'GEOTIFF', '2015-06-15',
+                                            '2016-12-31', window='year')
+        self.assertEqual(len(products), 2)
+        with self.assertRaises(ValueError):
+            cat.get_products_sharded('PROBAV_L3_S10_TOC_333M', 'GEOTIFF', '2015-06-15')
+        params = sorted((call[1]['params'] for call in mock_get.call_args_list),
+                        key=lambda p: p.get('year', ''))
+        self.assertEqual(params[0]['startDate'], '20150615')
+        self.assertEqual(params[0]['endDate'], '20151231')
+        self.assertEqual(params[1]['year'], '2016')
+
+    @mock.patch('requests.Session.get', side_effect=times_response)
     def test_get_times(self, mock_get):
         """Unit test for retrieval of times for a producttype."""
 
@@ -135,7 +350,7 @@ class TestCatalog(TestCase):
         times = cat.get_times('PROBAV_L3_S10_TOC_333M')
         self.assertEquals(len(times), 116)
 
-    @mock.patch('requests.get', side_effect=error_response)
+    @mock.patch('requests.Session.get', side_effect=error_response)
     def test_get_producttypes_error(self, mock_get):
         """Unit test to test error handling behaviour for retrieval of producttypes."""
 
@@ -143,7 +358,7 @@ class TestCatalog(TestCase):
             cat = catalog.Catalog()
             cat.get_producttypes()
 
-    @mock.patch('requests.get', side_effect=error_response)
+    @mock.patch('requests.Session.get', side_effect=error_response)
     def test_get_products_error(self, mock_get):
         """Unit test to test error handling behaviour for retrieval of products."""
 
@@ -153,10 +368,76 @@ class TestCatalog(TestCase):
                              startdate=datetime.date(2016, 1, 1),
                              enddate=datetime.date(2016, 1, 2))
 
-    @mock.patch('requests.get', side_effect=error_response)
+    @mock.patch('requests.Session.get', side_effect=error_response)
     def test_get_times_error(self, mock_get):
         """Unit test to test error handling behaviour for retrieval of times."""
 
         with self.assertRaises(HTTPError):
             cat = catalog.Catalog()
             cat.get_times('PROBAV_L3_S10_TOC_333M')
+
+    def _concurrent_calls(self, response, callers, catch=HTTPError, **kwargs):
+        """Calls get_times from several threads while the first request is held back."""
+
+        release = threading.Event()
+
+        def held_response(*args, **kwargs):
+            release.wait(5)
+            return response()
+
+        cat = catalog.Catalog(**kwargs)
+        outcomes = [None] * callers
+
+        def caller(position):
+            try:
+                outcomes[position] = cat.get_times('PROBAV_L3_S10_TOC_333M')
+            except catch as error:
+                outcomes[position] = error
+
+        with mock.patch('requests.Session.get', side_effect=held_response) as mock_get:
+            threads = [threading.Thread(target=caller, args=(i,)) for i in range(callers)]
+            for thread in threads:
+                thread.start()
+            deadline = time.time() + 5
+            while cat.coalesce and cat.coalesced < callers - 1 and time.time() < deadline:
+                time.sleep(0.001)
+            release.set()
+            for thread in threads:
+                thread.join()
+        return cat, mock_get.call_count, outcomes
+
+    def test_coalescing(self):
+        """Tests that identical concurrent calls share one request and result."""
+
+        calls = []
+        cat, requests, outcomes = self._concurrent_calls(times_response, 5, metrics=calls.append)
+        self.assertEqual((requests, cat.coalesced), (1, 4))
+        self.assertEqual(len(set(id(outcome) for outcome in outcomes)), 5)
+        self.assertTrue(all(outcome == outcomes[0] for outcome in outcomes))
+        self.assertEqual(len(outcomes[0]), len(times_response().json()))
+        outcomes[0].reverse()
+        self.assertNotEqual(outcomes[0], outcomes[1])
+        self.assertEqual(sorted(str(call.cache) for call in calls), ['None'] + ['coalesced'] * 4)
+        self.assertTrue(all(call.status == 200 and call.items == len(outcomes[0])
+                            for call in calls))
+
+        cat, requests, outcomes = self._concurrent_calls(error_response, 3)
+        self.assertEqual(requests, 1)
+        self.assertTrue(all(isinstance(outcome, HTTPError) for outcome in outcomes))
+
+        cat, requests, outcomes = self._concurrent_calls(times_response, 3, coalesce=False)
+        self.assertEqual(requests, 3)
+
+    def test_coalescing_interrupted(self):
+        """Tests that followers of a call interrupted by a BaseException do not get None."""
+
+        class Interrupted(BaseException):
+            pass
+
+        def interrupted_response():
+            raise Interrupted()
+
+        cat, requests, outcomes = self._concurrent_calls(interrupted_response, 2,
+                                                         catch=Interrupted)
+        self.assertEqual(requests, 1)
+        self.assertTrue(all(isinstance(outcome, Interrupted) for outcome in outcomes))
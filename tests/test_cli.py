@@ -0,0 +1,60 @@
+"""This module provides unit tests for the command-line batch query tool"""
+
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from mock import mock
+from catalogclient import catalog, cli
+from tests.test_catalog import error_response, probav_geotiff_stream_response
+
+
+class TestCli(TestCase):
+    """This class provides unit tests for the command-line batch query tool"""
+
+    @mock.patch('requests.Session.get', side_effect=probav_geotiff_stream_response)
+    def test_run(self, mock_get):
+        """Tests that the products of every query are written as NDJSON."""
+
+        queries = list(cli._queries([ # pylint: disable=W0212
+            '{"producttype": "PROBAV_L3_S10_TOC_333M", "fileformat": "GEOTIFF",'
+            ' "startdate": "2016-01-01", "enddate": "2016-01-31", "bbox": [4, 6.5, 50.5, 51.5]}',
+            '',
+            '{"producttype": "PROBAV_L3_S10_TOC_333M", "year": 2016}']))
+        output = StringIO()
+        log = StringIO()
+        self.assertEqual(cli.run(catalog.Catalog(), queries, output, log, max_workers=2), 0)
+
+        products = [catalog.Catalog._build_product(json.loads(line)) # pylint: disable=W0212
+                    for line in output.getvalue().splitlines()]
+        self.assertEqual(len(products), 4)
+        self.assertEqual(products[0].producttype, 'PROBAV_L3_S10_TOC_333M')
+        self.assertEqual(sorted(line.split(':')[0] for line in log.getvalue().splitlines()),
+                         ['query 1 PROBAV_L3_S10_TOC_333M 2016-01-01..2016-01-31',
+                          'query 2 PROBAV_L3_S10_TOC_333M 2016'])
+        params = sorted((call[1]['params']['minLat'], call[1]['params']['startDate'],
+                         call[1]['params']['endDate'], call[1]['stream'])
+                        for call in mock_get.call_args_list)
+        self.assertEqual(params, [(-90, '20160101', '20161231', True),
+                                  (50.5, '20160101', '20160131', True)])
+
+    @mock.patch('requests.Session.get', side_effect=error_response)
+    def test_main(self, mock_get):
+        """Tests reading queries from a file and the exit status of failed queries."""
+
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as queries:
+            queries.write('{"producttype": "PROBAV_L3_S10_TOC_333M"}\n')
+        try:
+            with mock.patch('sys.stderr', new_callable=StringIO) as log:
+                self.assertEqual(cli.main([queries.name, '--workers', '1']), 1)
+            self.assertIn('failed', log.getvalue())
+        finally:
+            os.remove(queries.name)
+
+        self.assertRaises(ValueError, list, cli._queries(['{"year": 2016}'])) # pylint: disable=W0212
@@ -0,0 +1,123 @@
+"""This module provides unit tests for the columnar product collection"""
+
+import datetime
+import json
+from unittest import TestCase, skipIf
+
+from mock import mock
+
+try:
+    import numpy as np
+    from catalogclient import collection
+except ImportError:
+    collection = None
+try:
+    import pandas
+except ImportError:
+    pandas = None
+from catalogclient import catalog
+from tests.test_catalog import probav_geotiff_response
+
+
+def _products_json():
+    with open('testresources/probav_geotiff.json', 'r') as json_input:
+        dct = json.loads(json_input.read())
+    # add a second date and tile, so there is something to filter on
+    later = json.loads(json.dumps(dct[0]))
+    later['timestamp'] = '2016-01-11T00:00:00Z'
+    later['tileX'] = 3
+    later['files'] = later['files'][:1]
+    later['geometry']['coordinates'] = [[[30.0, 65.0], [30.0, 55.0], [40.0, 55.0],
+                                         [40.0, 65.0], [30.0, 65.0]]]
+    return dct + [later]
+
+
+@skipIf(collection is None, "numpy is not installed")
+class TestProductCollection(TestCase):
+    """This class provides unit tests for the columnar product collection"""
+
+    def setUp(self):
+        self.products = collection.ProductCollection.from_json(_products_json())
+
+    def test_columns(self):
+        """Tests the columns built from a products response."""
+
+        self.assertEqual(len(self.products), 3)
+        self.assertEqual(list(self.products.tilex), [0, 0, 3])
+        self.assertEqual(list(self.products.tiley), [0, 1, 0])
+        self.assertEqual(self.products.timestamp[2], np.datetime64('2016-01-11T00:00:00'))
+        self.assertEqual(tuple(self.products.bbox[0]), (0.0, 55.0, 10.0, 65.0))
+        self.assertTrue(np.isnan(self.products.bbox[1]).all())
+        self.assertEqual(list(self.products.file_offsets), [0, 5, 10, 11])
+
+    def test_iteration(self):
+        """Tests that iterating yields products equal to those of the catalog."""
+
+        expected = catalog.Catalog._build_products(_products_json()) # pylint: disable=W0212
+        for product, other in zip(self.products, expected):
+            self.assertEqual(str(product), str(other))
+            self.assertEqual(product.bands(), other.bands())
+            self.assertEqual(product.file('PROBAV:TIME'), other.file('PROBAV:TIME'))
+            self.assertEqual(product.timestamp, other.timestamp)
+            self.assertEqual(product.bbox, other.bbox)
+        self.assertEqual(self.products[-1].tilex, 3)
+
+    def test_from_products(self):
+        """Tests building a collection from EOProduct objects."""
+
+        products = catalog.Catalog._build_products(_products_json()) # pylint: disable=W0212
+        products[0].geometry # pylint: disable=W0104
+        other = collection.ProductCollection.from_products(products)
+        self.assertEqual(list(other.band_codes), list(self.products.band_codes))
+        np.testing.assert_array_equal(other.bbox, self.products.bbox)
+        np.testing.assert_array_equal(other.timestamp, self.products.timestamp)
+
+    def test_filter(self):
+        """Tests vectorised filtering."""
+
+        self.assertEqual(len(self.products.filter(tile=(0, 1))), 1)
+        in_range = self.products.filter(time_range=('2016-01-05', None))
+        self.assertEqual(list(in_range.tilex), [3])
+        self.assertEqual([f.filename for f in in_range[0].files],
+                         [self.products.filenames[10]])
+        self.assertEqual(len(self.products.filter(band='PROBAV:NDVI')), 2)
+        self.assertEqual(len(self.products.filter(band='PROBAV:TIME')), 3)
+        self.assertEqual(len(self.products.filter(band='unknown')), 0)
+        self.assertEqual(list(self.products.filter(bbox=(35, 50, 50, 60)).tilex), [3])
+        filtered = self.products.filter(band='PROBAV:NDVI',
+                                        time_range=(datetime.datetime(2016, 1, 1),
+                                                    datetime.datetime(2016, 1, 1)))
+        self.assertEqual(filtered[1].file('PROBAV:NDVI'), self.products[1].file('PROBAV:NDVI'))
+
+    def test_filter_whole_day(self):
+        """Tests that a date end includes products later on that day."""
+
+        dct = _products_json()
+        dct[2]['timestamp'] = '2016-01-11T10:30:00Z'
+        products = collection.ProductCollection.from_json(dct)
+        for end in (datetime.date(2016, 1, 11), '2016-01-11', '20160111'):
+            self.assertEqual(len(products.filter(time_range=('2016-01-11', end))), 1)
+        self.assertEqual(len(products.filter(time_range=(None, '2016-01-11T10:00:00Z'))), 2)
+
+    def test_groupby_tile(self):
+        """Tests splitting a collection per tile."""
+
+        groups = self.products.groupby_tile()
+        self.assertEqual(sorted(groups), [(0, 0), (0, 1), (3, 0)])
+        self.assertEqual(groups[(0, 1)][0].bands(), self.products[1].bands())
+
+    @skipIf(pandas is None, "pandas is not installed")
+    def test_to_pandas(self):
+        """Tests conversion to a pandas DataFrame."""
+
+        frame = self.products.to_pandas()
+        self.assertEqual(list(frame['tilex']), [0, 0, 3])
+        self.assertEqual(frame['timestamp'][2], pandas.Timestamp('2016-01-11'))
+        self.assertEqual(frame['maxx'][0], 10.0)
+
+    @mock.patch('requests.Session.get', side_effect=probav_geotiff_response)
+    def test_get_product_collection(self, mock_get):
+        """Unit test for retrieval of products as a collection."""
+
+        products = catalog.Catalog().get_product_collection('PROBAV_L3_S10_TOC_333M')
+        self.assertEqual(len(products), 2)
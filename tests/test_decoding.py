@@ -0,0 +1,52 @@
+"""This module provides unit tests for the JSON decoders and transfer encodings"""
+
+from unittest import TestCase, skipIf
+
+from mock import mock
+from catalogclient import catalog, decoding
+from tests.test_catalog import probav_geotiff_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class TestDecoding(TestCase):
+    """This class provides unit tests for the JSON decoders and transfer encodings"""
+
+    def test_json_decoder(self):
+        """Tests the standard library decoder on bytes."""
+
+        loads = decoding.get_decoder('json')
+        self.assertEqual(loads(b'[{"tileX": 1}, "\\u00e9"]'), [{'tileX': 1}, u'\u00e9'])
+        self.assertRaises(ValueError, decoding.get_decoder, 'yaml')
+
+    @skipIf(orjson is None, "orjson is not installed")
+    def test_default_decoder(self):
+        """Tests that orjson is used when it is installed."""
+
+        self.assertIs(decoding.get_decoder(), orjson.loads)
+
+    @mock.patch.dict('sys.modules', {'brotli': None, 'brotlicffi': None})
+    def test_accept_encoding(self):
+        """Tests the negotiated transfer encodings."""
+
+        self.assertEqual(decoding.accept_encoding(), 'gzip, deflate')
+        cat = catalog.Catalog()
+        self.assertEqual(cat.session.headers['Accept-Encoding'], 'gzip, deflate')
+
+    @mock.patch('requests.Session.get', side_effect=probav_geotiff_response)
+    def test_catalog_decoder(self, mock_get):
+        """Tests that the catalog decodes the response bytes with its decoder."""
+
+        decoded = []
+
+        def loads(content):
+            decoded.append(content)
+            return decoding.get_decoder('json')(content)
+
+        products = catalog.Catalog(decoder=loads).get_products('PROBAV_L3_S1_TOC_1KM', 'GEOTIFF')
+        self.assertEqual(len(products), 2)
+        self.assertIsInstance(decoded[0], bytes)
+        self.assertEqual(catalog.Catalog(decoder='json').decoder(b'[1]'), [1])
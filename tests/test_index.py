@@ -0,0 +1,124 @@
+"""This module provides unit tests for the local product indexes"""
+
+import datetime
+from unittest import TestCase
+
+from mock import mock
+from catalogclient import catalog, index
+
+
+def _product(day, tilex, tiley):
+    geometry = {'type': 'Polygon',
+                'coordinates': [[[tilex * 10.0, 65.0 - tiley * 10], [tilex * 10.0, 55.0 - tiley * 10],
+                                 [tilex * 10.0 + 10, 55.0 - tiley * 10],
+                                 [tilex * 10.0 + 10, 65.0 - tiley * 10],
+                                 [tilex * 10.0, 65.0 - tiley * 10]]]}
+    return catalog.EOProduct('PROBAV_L3_S10_TOC_333M', tilex, tiley, [], geometry,
+                             '2016-01-%02dT00:00:00Z' % day)
+
+
+class TestSpatioTemporalIndex(TestCase):
+    """This class provides unit tests for the spatio-temporal product index"""
+
+    def setUp(self):
+        products = [_product(day, x, y) for day in (21, 1, 11) for x in range(3) for y in range(2)]
+        products.append(catalog.EOProduct('PROBAV_L3_S10_TOC_333M', 9, 9, [], None,
+                                          '2016-01-11T00:00:00Z'))
+        self.index = index.SpatioTemporalIndex(products)
+
+    def test_region(self):
+        """Tests searches by region of interest."""
+
+        products = self.index.get_products(min_lon=12, max_lon=15, min_lat=50, max_lat=52)
+        self.assertEqual([(p.tilex, p.tiley, p.timestamp.day) for p in products],
+                         [(1, 1, 1), (1, 1, 11), (9, 9, 11), (1, 1, 21)])
+        # touching tiles match, like in the catalog
+        products = self.index.get_products('2016-01-01', '2016-01-01',
+                                           min_lon=20, max_lon=25, min_lat=56, max_lat=58)
+        self.assertEqual([(p.tilex, p.tiley) for p in products], [(1, 0), (2, 0)])
+
+    def test_date_range(self):
+        """Tests searches by inclusive date range."""
+
+        products = self.index.get_products(datetime.date(2016, 1, 2), datetime.date(2016, 1, 21))
+        self.assertEqual(len(products), 13)
+        products = self.index.get_products(enddate=datetime.datetime(2016, 1, 11, 0, 0))
+        self.assertEqual(products[-1].timestamp, datetime.datetime(2016, 1, 11))
+        self.assertEqual(len(products), 13)
+        self.assertEqual(len(self.index.get_products()), 19)
+
+    @mock.patch('catalogclient.catalog.Catalog.get_products')
+    def test_from_catalog(self, mock_get_products):
+        """Tests that searches outside of the indexed search are refused."""
+
+        mock_get_products.return_value = [_product(1, 0, 0)]
+        cached = index.SpatioTemporalIndex.from_catalog(catalog.Catalog(), 'PROBAV_L3_S10_TOC_333M',
+                                                        startdate='2016-01-01',
+                                                        enddate='2016-01-31',
+                                                        min_lon=0, max_lon=20)
+        self.assertEqual(len(cached.get_products('2016-01-01', '2016-01-05',
+                                                 min_lon=5, max_lon=6)), 1)
+        with self.assertRaises(ValueError):
+            cached.get_products('2016-01-01', '2016-01-05', min_lon=-5, max_lon=6)
+        with self.assertRaises(ValueError):
+            cached.get_products(None, '2016-01-05', min_lon=5, max_lon=6)
+
+
+class TestTimeSeriesIndex(TestCase):
+    """This class provides unit tests for the per tile time series index"""
+
+    def setUp(self):
+        products = [_product(day, x, 0) for day in (21, 1, 11, 6) for x in range(2)]
+        products.append(catalog.EOProduct('PROBAV_L3_S10_TOC_333M', 0, 0, [], None, None))
+        self.index = index.TimeSeriesIndex(iter(products))
+        self.tile = ('PROBAV_L3_S10_TOC_333M', 0, 0)
+
+    def test_series(self):
+        """Tests that the products are grouped per tile and sorted."""
+
+        self.assertEqual(len(self.index), 8)
+        self.assertEqual(self.index.tiles(), [self.tile, ('PROBAV_L3_S10_TOC_333M', 1, 0)])
+        self.assertEqual([t.day for t in self.index.times(*self.tile)], [1, 6, 11, 21])
+        self.assertEqual(self.index.times('PROBAV_L3_S10_TOC_333M', 5, 5), [])
+
+    def test_lookups(self):
+        """Tests nearest, before and after lookups."""
+
+        def day(product):
+            return None if product is None else product.timestamp.day
+
+        self.assertEqual(day(self.index.nearest(*self.tile, moment='2016-01-08T12:00:00Z')), 6)
+        self.assertEqual(day(self.index.nearest(*self.tile, moment=datetime.date(2016, 1, 9))), 11)
+        self.assertEqual(day(self.index.nearest(*self.tile, moment=datetime.date(2016, 2, 1))), 21)
+        self.assertEqual(day(self.index.before(*self.tile, moment='2016-01-11')), 11)
+        self.assertEqual(day(self.index.before(*self.tile, moment='2016-01-11', inclusive=False)),
+                         6)
+        self.assertIsNone(self.index.before(*self.tile, moment=datetime.datetime(2015, 12, 31)))
+        self.assertEqual(day(self.index.after(*self.tile, moment='2016-01-11', inclusive=False)),
+                         21)
+        self.assertIsNone(self.index.after(*self.tile, moment='2016-01-22'))
+        self.assertIsNone(self.index.nearest('PROBAV_L3_S10_TOC_333M', 5, 5, '2016-01-01'))
+
+    def test_between(self):
+        """Tests time window lookups."""
+
+        products = self.index.between(*self.tile, start='2016-01-06',
+                                      end=datetime.date(2016, 1, 11))
+        self.assertEqual([p.timestamp.day for p in products], [6, 11])
+        products = self.index.between(*self.tile, end=datetime.datetime(2016, 1, 10))
+        self.assertEqual([p.timestamp.day for p in products], [1, 6])
+
+        afternoon = index.TimeSeriesIndex([catalog.EOProduct('P', 0, 0, [], None,
+                                                             '2016-01-11T10:30:00Z')])
+        for end in (datetime.date(2016, 1, 11), '2016-01-11', '20160111'):
+            self.assertEqual(len(afternoon.between('P', 0, 0, end=end)), 1)
+        self.assertEqual(afternoon.between('P', 0, 0, end='2016-01-11T10:00:00Z'), [])
+
+    @mock.patch('catalogclient.catalog.Catalog.iter_products')
+    def test_from_catalog(self, mock_iter_products):
+        """Tests building the index from a streaming catalog search."""
+
+        mock_iter_products.return_value = iter([_product(1, 0, 0)])
+        time_series = index.TimeSeriesIndex.from_catalog(catalog.Catalog(),
+                                                         'PROBAV_L3_S10_TOC_333M', 'GEOTIFF')
+        self.assertEqual(len(time_series), 1)
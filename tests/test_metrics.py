@@ -0,0 +1,80 @@
+"""This module provides unit tests for the catalog client instrumentation"""
+
+from unittest import TestCase
+
+from mock import mock
+from requests.exceptions import HTTPError
+from catalogclient import cache, catalog, metrics
+from tests.test_cache import CachedResponse
+
+
+def probav_geotiff_response(*args, **kwargs):
+    with open('testresources/probav_geotiff.json', 'rb') as json_input:
+        return CachedResponse(200, json_input.read())
+
+
+class TestMetrics(TestCase):
+    """This class provides unit tests for the catalog client instrumentation"""
+
+    def test_aggregator(self):
+        """Tests percentiles and counters of the aggregator."""
+
+        aggregator = metrics.MetricsAggregator(samples=100, percentiles=(50, 100))
+        for i in range(101):
+            call = metrics.CallMetrics('get_times', 'http://x/times')
+            call.request = i / 100.0
+            call.items = 2
+            call.status = 200 if i else 500
+            aggregator(call)
+        summary = aggregator.summary()['get_times']
+        self.assertEqual(summary['calls'], 101)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['items'], 202)
+        self.assertAlmostEqual(summary['request'][50], 0.505)
+        self.assertEqual(summary['request'][100], 1.0)
+        self.assertEqual(summary['build'][50], 0.0)
+        aggregator.reset()
+        self.assertEqual(aggregator.summary(), {})
+
+    @mock.patch('requests.Session.get', side_effect=probav_geotiff_response)
+    def test_catalog_metrics(self, mock_get):
+        """Tests the metrics reported for catalog calls."""
+
+        calls = []
+        cat = catalog.Catalog(metrics=calls.append, cache=cache.ResponseCache())
+        cat.get_products('PROBAV_L3_S10_TOC_333M', fileformat='GEOTIFF')
+        cat.get_products('PROBAV_L3_S10_TOC_333M', fileformat='GEOTIFF')
+        self.assertTrue(mock_get.call_args[1]['stream'])
+
+        miss, hit = calls
+        self.assertEqual(miss.method, 'get_products')
+        self.assertEqual((miss.status, miss.cache, miss.items), (200, 'miss', 2))
+        self.assertGreater(miss.response_bytes, 3000)
+        self.assertGreater(miss.decode, 0)
+        self.assertGreater(miss.build, 0)
+        self.assertEqual((hit.cache, hit.request, hit.response_bytes), ('hit', 0, 0))
+        self.assertGreater(hit.total, 0)
+        self.assertIn('cache=hit', str(hit))
+
+    @mock.patch('requests.Session.get', side_effect=lambda *args, **kwargs: CachedResponse(503))
+    def test_error_metrics(self, mock_get):
+        """Tests that failing calls are reported."""
+
+        aggregator = metrics.MetricsAggregator()
+        cat = catalog.Catalog(metrics=aggregator)
+        with mock.patch.object(CachedResponse, 'raise_for_status', create=True,
+                               side_effect=HTTPError()):
+            with self.assertRaises(HTTPError):
+                cat.get_times('PROBAV_L3_S10_TOC_333M')
+        self.assertEqual(aggregator.summary()['get_times']['errors'], 1)
+
+    def test_coalesced_metrics(self):
+        """Tests that coalesced calls are counted."""
+
+        aggregator = metrics.MetricsAggregator()
+        for cache in (None, 'hit', 'coalesced', 'coalesced'):
+            call = metrics.CallMetrics('get_times', 'times')
+            call.cache = cache
+            aggregator(call)
+        summary = aggregator.summary()['get_times']
+        self.assertEqual((summary['calls'], summary['cache_hits'], summary['coalesced']), (4, 1, 2))
@@ -0,0 +1,82 @@
+"""This module provides unit tests for the local file resolver"""
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import mock
+from catalogclient import catalog, resolver
+
+
+class TestFileResolver(TestCase):
+    """This class provides unit tests for the local file resolver"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for day in ('20160101', '20160111'):
+            os.mkdir(os.path.join(self.directory, day))
+            for band in ('NDVI', 'SM'):
+                with open(os.path.join(self.directory, day, band + '.tif'), 'wb') as output:
+                    output.write(b'tif')
+        open(os.path.join(self.directory, '20160111', 'EMPTY.tif'), 'wb').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _product(self, day, *names):
+        files = [catalog.EOProductFile('file:' + os.path.join(self.directory, day, name),
+                                       ['PROBAV:NDVI']) for name in names]
+        return catalog.EOProduct('PROBAV_L3_S10_TOC_333M', 0, 0, files)
+
+    def test_local_path(self):
+        """Tests conversion of file URIs to local paths."""
+
+        self.assertEqual(resolver.local_path('file:/data/MTDA/a%20b.tif'), '/data/MTDA/a b.tif')
+        self.assertEqual(resolver.local_path('file:///data/MTDA/a.tif'), '/data/MTDA/a.tif')
+        self.assertEqual(resolver.local_path('/data/MTDA/a.tif'), '/data/MTDA/a.tif')
+        self.assertIsNone(resolver.local_path('https://example.com/a.tif'))
+
+    def test_resolve(self):
+        """Tests that available and missing products are separated."""
+
+        products = [self._product('20160101', 'NDVI.tif', 'SM.tif'),
+                    self._product('20160111', 'NDVI.tif', 'EMPTY.tif'),
+                    self._product('20160121', 'NDVI.tif'),
+                    catalog.EOProduct('PROBAV_L3_S10_TOC_333M', 0, 0,
+                                      [catalog.EOProductFile('https://example.com/NDVI.tif', [])])]
+        available, missing = resolver.FileResolver(max_workers=2).resolve(products)
+        self.assertEqual([product for product, _ in available], products[:2])
+        self.assertEqual([product for product, _ in missing], products[2:])
+
+        available, missing = resolver.FileResolver(max_workers=2, min_size=1).resolve(products)
+        self.assertEqual(len(available), 1)
+        self.assertIs(available[0][0], products[0])
+        self.assertEqual(available[0][1], [os.path.join(self.directory, '20160101', 'NDVI.tif'),
+                                           os.path.join(self.directory, '20160101', 'SM.tif')])
+        self.assertEqual([product for product, _ in missing], products[1:])
+        self.assertEqual([os.path.basename(f) for f in missing[0][1]], ['EMPTY.tif'])
+
+    def test_sizes(self):
+        """Tests looking up file sizes."""
+
+        paths = [os.path.join(self.directory, '20160111', name)
+                 for name in ('NDVI.tif', 'EMPTY.tif', 'MISSING.tif')]
+        self.assertEqual(resolver.FileResolver().sizes(paths),
+                         dict(zip(paths, (3, 0, None))))
+        self.assertEqual(resolver.FileResolver().exists(paths),
+                         dict(zip(paths, (True, True, False))))
+
+    def test_listing_cache(self):
+        """Tests that each directory is listed once."""
+
+        products = [self._product('20160101', 'NDVI.tif'), self._product('20160101', 'SM.tif'),
+                    self._product('20160111', 'SM.tif')]
+        files = resolver.FileResolver()
+        with mock.patch('catalogclient.resolver.scandir', side_effect=resolver.scandir) as listed:
+            self.assertEqual(len(files.resolve(products)[0]), 3)
+            self.assertEqual(len(files.resolve(products)[0]), 3)
+            self.assertEqual(listed.call_count, 2)
+            files.clear()
+            files.resolve(products)
+            self.assertEqual(listed.call_count, 4)
@@ -0,0 +1,124 @@
+"""This module provides unit tests for the catalog request scheduler"""
+
+import threading
+import time
+from unittest import TestCase
+
+import requests
+from mock import mock
+from catalogclient import catalog, scheduler
+from tests.test_catalog import times_response
+
+
+class StatusResponse(object):
+    """This class represents a mocked requests.Response object with a status and headers"""
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestScheduler(TestCase):
+    """This class provides unit tests for the catalog request scheduler"""
+
+    def test_adaptive_limit(self):
+        """Tests additive increase and multiplicative decrease of the limit."""
+
+        limit = scheduler.AdaptiveLimit(initial=8, minimum=2, maximum=9)
+        limit.acquire()
+        limit.release(overloaded=True)
+        self.assertEqual(limit.limit, 4)
+        for _ in range(4):
+            limit.acquire()
+            limit.release()
+        self.assertAlmostEqual(limit.limit, 4.92, places=2)
+        for _ in range(4):
+            limit.acquire()
+            limit.release()
+        for _ in range(6):
+            limit.acquire()
+            limit.release(overloaded=True)
+        self.assertEqual(limit.limit, 2)
+        self.assertEqual(limit.in_flight, 0)
+
+    def test_adaptive_limit_burst(self):
+        """Tests that a burst of overloaded responses cuts the limit only once."""
+
+        limit = scheduler.AdaptiveLimit(initial=8, maximum=8)
+        for _ in range(8):
+            limit.acquire()
+        for _ in range(8):
+            limit.release(overloaded=True)
+        self.assertEqual(limit.limit, 4)
+        limit.acquire()
+        limit.release(overloaded=True)
+        self.assertEqual(limit.limit, 2)
+
+    def test_token_bucket(self):
+        """Tests that the token bucket limits the request rate."""
+
+        bucket = scheduler.TokenBucket(rate=200, burst=2)
+        start = time.time()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.time() - start, 0.018)
+
+    def test_retry(self):
+        """Tests that overloaded responses are retried with backoff."""
+
+        responses = [StatusResponse(503), StatusResponse(429, {'Retry-After': '0'}),
+                     StatusResponse(200)]
+        sched = scheduler.RequestScheduler(backoff_base=0.001)
+        response = sched.execute(lambda: responses.pop(0))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sched.retries, 2)
+        self.assertLess(sched.concurrency.limit, 4)
+
+    def test_retries_exhausted(self):
+        """Tests that the last response is returned once retries are exhausted."""
+
+        sched = scheduler.RequestScheduler(max_retries=2, backoff_base=0.001)
+        send = mock.Mock(side_effect=lambda: StatusResponse(500))
+        self.assertEqual(sched.execute(send).status_code, 500)
+        self.assertEqual(send.call_count, 3)
+
+        send = mock.Mock(side_effect=requests.ConnectionError())
+        with self.assertRaises(requests.ConnectionError):
+            sched.execute(send)
+        self.assertEqual(send.call_count, 3)
+
+    def test_concurrency_bound(self):
+        """Tests that concurrent requests stay within the limit."""
+
+        sched = scheduler.RequestScheduler(scheduler.AdaptiveLimit(initial=3, maximum=3))
+        state = {'running': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def send():
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+            return StatusResponse(200)
+
+        threads = [threading.Thread(target=sched.execute, args=(send,)) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(state['peak'], 3)
+
+    @mock.patch('requests.Session.get')
+    def test_catalog_scheduler(self, mock_get):
+        """Tests that catalog requests go through the scheduler."""
+
+        mock_get.side_effect = [StatusResponse(502), times_response()]
+        cat = catalog.Catalog(scheduler=scheduler.RequestScheduler(backoff_base=0.001))
+        self.assertEqual(len(cat.get_times('PROBAV_L3_S10_TOC_333M')), 116)
+        self.assertEqual(mock_get.call_count, 2)
@@ -0,0 +1,74 @@
+"""This module provides unit tests for saving and loading catalog search results"""
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase, skipIf
+
+try:
+    import numpy as np
+    from catalogclient import collection, storage
+except ImportError:
+    storage = None
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+from catalogclient import catalog
+from tests.test_collection import _products_json
+
+
+@skipIf(storage is None, "numpy is not installed")
+class TestStorage(TestCase):
+    """This class provides unit tests for saving and loading catalog search results"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.products = collection.ProductCollection.from_json(_products_json())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _roundtrip(self, name, products=None):
+        path = os.path.join(self.directory, name)
+        storage.write_products(self.products if products is None else products, path)
+        return storage.read_products(path)
+
+    def assertSameProducts(self, loaded):
+        self.assertEqual([p.to_dict() for p in loaded], [p.to_dict() for p in self.products])
+        np.testing.assert_array_equal(loaded.bbox, self.products.bbox)
+        self.assertEqual(list(loaded.filter(band='PROBAV:NDVI').tiley), [0, 1])
+
+    @skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_arrow(self):
+        """Tests that Arrow files are memory-mapped and decoded lazily."""
+
+        loaded = self._roundtrip('products.arrow')
+        self.assertTrue(callable(loaded._columns['filenames'])) # pylint: disable=W0212
+        self.assertFalse(loaded.tilex.flags['OWNDATA'])
+        self.assertFalse(loaded.timestamp.flags['OWNDATA'])
+        self.assertEqual(loaded.timestamp[2], np.datetime64('2016-01-11T00:00:00'))
+        self.assertSameProducts(loaded)
+
+    @skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        """Tests saving to Parquet."""
+
+        self.assertSameProducts(self._roundtrip('products.parquet'))
+
+    def test_ndjson(self):
+        """Tests saving to NDJSON."""
+
+        path = os.path.join(self.directory, 'products.ndjson')
+        storage.write_products(self.products, path)
+        with open(path) as source:
+            self.assertEqual(len(source.readlines()), 3)
+        self.assertSameProducts(storage.read_products(path))
+
+    @skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_eoproducts(self):
+        """Tests saving a list of EOProducts."""
+
+        products = catalog.Catalog._build_products(_products_json()) # pylint: disable=W0212
+        products[1].timestamp # pylint: disable=W0104
+        self.assertSameProducts(self._roundtrip('products', products))
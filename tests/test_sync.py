@@ -0,0 +1,122 @@
+"""This module provides unit tests for the synchronisation of a local product index"""
+
+import datetime
+import json
+from unittest import TestCase
+
+from mock import mock
+from requests.exceptions import HTTPError
+from catalogclient import catalog, sync
+
+
+def _product(timestamp, tilex=0):
+    return catalog.EOProduct('PROBAV_L3_S10_TOC_333M', tilex, 0,
+                             [catalog.EOProductFile('file:/data/a.tif', ['PROBAV:NDVI'])],
+                             None, timestamp.strftime(catalog.TIMESTAMP_FORMAT))
+
+
+class FakeCatalog(object):
+    """This class represents a catalog serving two tiles for each of its times"""
+
+    def __init__(self, times, failing=()):
+        self.times = times
+        self.failing = failing
+        self.requested = []
+
+    def get_times(self, producttype):
+        return list(reversed(self.times))
+
+    def get_products(self, producttype, fileformat, startdate, enddate, *bbox):
+        self.requested.append(startdate)
+        if startdate in self.failing:
+            raise HTTPError()
+        return [_product(t, x) for t in self.times if t.date() == startdate for x in (0, 1)]
+
+
+class TestSync(TestCase):
+    """This class provides unit tests for the synchronisation of a local product index"""
+
+    def setUp(self):
+        self.times = [datetime.datetime(2016, 1, d) for d in (1, 11, 21)]
+        self.index = sync.ProductIndex(':memory:')
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_initial_sync(self):
+        """Tests that an empty index fetches all times."""
+
+        cat = FakeCatalog(self.times)
+        count = sync.CatalogSync(cat, self.index, 'GEOTIFF').sync('PROBAV_L3_S10_TOC_333M')
+        self.assertEqual(count, 6)
+        self.assertEqual(sorted(cat.requested), [t.date() for t in self.times])
+        self.assertEqual(self.index.high_water_mark('PROBAV_L3_S10_TOC_333M', 'GEOTIFF'),
+                         self.times[-1])
+        products = self.index.products('PROBAV_L3_S10_TOC_333M', 'GEOTIFF',
+                                       startdate=datetime.datetime(2016, 1, 5))
+        self.assertEqual([(p.timestamp.day, p.tilex) for p in products],
+                         [(11, 0), (11, 1), (21, 0), (21, 1)])
+        self.assertEqual(products[0].file('PROBAV:NDVI'), 'file:/data/a.tif')
+
+    def test_incremental_sync(self):
+        """Tests that later syncs only fetch times after the high-water mark."""
+
+        sync.CatalogSync(FakeCatalog(self.times), self.index).sync('P')
+        newer = self.times + [datetime.datetime(2016, 2, 1)]
+        cat = FakeCatalog(newer)
+        self.assertEqual(sync.CatalogSync(cat, self.index).sync('P'), 2)
+        self.assertEqual(cat.requested, [datetime.date(2016, 2, 1)])
+
+        backfilled = [datetime.datetime(2015, 12, 21)] + newer
+        cat = FakeCatalog(backfilled)
+        self.assertEqual(sync.CatalogSync(cat, self.index).sync('P'), 0)
+        self.assertEqual(sync.CatalogSync(cat, self.index).sync('P', full=True), 2)
+        self.assertEqual(cat.requested, [datetime.date(2015, 12, 21)])
+
+    def test_failed_date(self):
+        """Tests that the high-water mark stops before a failed date."""
+
+        cat = FakeCatalog(self.times, failing=[datetime.date(2016, 1, 11)])
+        with self.assertRaises(HTTPError):
+            sync.CatalogSync(cat, self.index).sync('P')
+        self.assertEqual(self.index.high_water_mark('P', 'HDF5'), self.times[0])
+        self.assertEqual(self.index.times('P', 'HDF5'), set([self.times[0], self.times[2]]))
+
+        cat = FakeCatalog(self.times)
+        self.assertEqual(sync.CatalogSync(cat, self.index).sync('P'), 4)
+        self.assertEqual(sorted(cat.requested), [datetime.date(2016, 1, 11),
+                                                 datetime.date(2016, 1, 21)])
+
+    def test_stored_products(self):
+        """Tests that indexed products match the catalog response."""
+
+        with open('testresources/probav_geotiff.json', 'r') as json_input:
+            dct = json.loads(json_input.read())
+        products = catalog.Catalog._build_products(dct) # pylint: disable=W0212
+        self.index.add('PROBAV_L3_S10_TOC_333M', 'GEOTIFF', [], products)
+        stored = self.index.products('PROBAV_L3_S10_TOC_333M', 'GEOTIFF')
+        self.assertEqual([p.to_dict() for p in stored], dct)
+
+    def test_products_time_range(self):
+        """Tests the bounds of a time range given as dates, strings and datetimes."""
+
+        times = [datetime.datetime(2016, 1, 10, 23), datetime.datetime(2016, 1, 11, 10, 30),
+                 datetime.datetime(2016, 1, 12)]
+        self.index.add('P', 'HDF5', [], [_product(t) for t in times])
+
+        def found(startdate, enddate):
+            return [p.timestamp for p in self.index.products('P', 'HDF5', startdate, enddate)]
+
+        self.assertEqual(found(datetime.date(2016, 1, 11), datetime.date(2016, 1, 11)),
+                         times[1:2])
+        self.assertEqual(found('2016-01-11', '2016-01-11'), times[1:2])
+        self.assertEqual(found('20160111', None), times[1:])
+        self.assertEqual(found(None, datetime.datetime(2016, 1, 11, 10, 30)), times[:2])
+        self.assertEqual(found('2016-01-11T00:00:00Z', '2016-01-11T10:00:00Z'), [])
+
+    @mock.patch('catalogclient.catalog.Catalog.get_times', return_value=[])
+    def test_nothing_to_sync(self, mock_get_times):
+        """Tests a sync when the catalog has no times."""
+
+        self.assertEqual(sync.CatalogSync(catalog.Catalog(), self.index).sync('P'), 0)
+        self.assertIsNone(self.index.high_water_mark('P', 'HDF5'))